@@ -1,14 +1,14 @@
 # Lal.py - Full working version for discord.py 2.x (with global blacklist decorator)
 
 import os
-import re
 import threading
 import json
 import discord
 from discord import app_commands
 from flask import Flask
-import aiohttp
 import asyncio
+from http_client import open_http_session, get_http_session, run_client
+from link_extract import unique_links, LOOSE
 
 # ---- Config / Secrets ----
 TOKEN = os.getenv("TOKEN")
@@ -74,25 +74,12 @@ def run_flask():
 async def fetch_group_posts():
     url = f"https://groups.roblox.com/v2/groups/{GROUP_ID}/wall/posts?sortOrder=Desc&limit=100"
     headers = {"Cookie": f".ROBLOSECURITY={ROBLOX_COOKIE}"} if ROBLOX_COOKIE else {}
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as resp:
-            if resp.status != 200:
-                print(f"⚠️ Failed to fetch posts: {resp.status}")
-                return []
-            data = await resp.json()
-    links = []
-    for post in data.get("data", []):
-        content = post.get("body", "")
-        found = re.findall(r"(https?://[^\s]+roblox\.com/[^\s]*)", content)
-        links.extend(found)
-    # dedupe
-    seen = set()
-    unique_links = []
-    for l in links:
-        if l not in seen:
-            seen.add(l)
-            unique_links.append(l)
-    return unique_links
+    async with get_http_session().get(url, headers=headers) as resp:
+        if resp.status != 200:
+            print(f"⚠️ Failed to fetch posts: {resp.status}")
+            return []
+        data = await resp.json()
+    return unique_links((post.get("body", "") for post in data.get("data", [])), LOOSE)
 
 # ---- Global blacklist decorator ----
 def blacklist_check():
@@ -218,10 +205,11 @@ async def kaisen_command(interaction: discord.Interaction):
 # ---- On ready ----
 @client.event
 async def on_ready():
+    await open_http_session()
     await tree.sync(guild=None)
     print(f"✅ Logged in as {client.user}")
 
 # ---- Run Flask thread and Discord client ----
 flask_thread = threading.Thread(target=run_flask)
 flask_thread.start()
-client.run(TOKEN)
+run_client(client, TOKEN)
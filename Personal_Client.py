@@ -9,8 +9,10 @@ import asyncio
 import discord
 from discord import app_commands
 from flask import Flask
-import aiohttp
+from http_client import open_http_session, get_http_session, run_client
 from discord.ui import View, Button
+from roblox_wall import get_snapshot, start_wall_poller, revalidate_if_stale, freshness_text
+from link_extract import LOOSE
 
 # ---- Config / Secrets ----
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -188,35 +190,8 @@ def owner_only():
         return interaction.user.id == OWNER_ID
     return app_commands.check(predicate)
 
-# ---- Roblox group wall fetcher ----
-async def fetch_group_posts():
-    if not GROUP_ID:
-        return []
-    url = f"https://groups.roblox.com/v2/groups/{GROUP_ID}/wall/posts?sortOrder=Desc&limit=100"
-    headers = {"Cookie": f".ROBLOSECURITY={ROBLOX_COOKIE}"} if ROBLOX_COOKIE else {}
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as resp:
-                if resp.status != 200:
-                    print(f"[WARN] fetch_group_posts HTTP {resp.status}")
-                    return []
-                data = await resp.json()
-    except Exception as e:
-        print(f"[ERROR] fetch_group_posts: {e}")
-        return []
-    links = []
-    for post in data.get("data", []):
-        content = post.get("body", "")
-        found = re.findall(r"(https?://[^\s]+roblox\.com/[^\s]*)", content)
-        links.extend(found)
-    # dedupe preserving order
-    seen = set()
-    unique = []
-    for l in links:
-        if l not in seen:
-            seen.add(l)
-            unique.append(l)
-    return unique
+# ---- Roblox group wall links ----
+LINK_MODE = LOOSE
 
 # ---- Invite resolver with caching and basic 429 handling ----
 async def resolve_invite_code(code: str):
@@ -226,22 +201,21 @@ async def resolve_invite_code(code: str):
         return INVITE_CACHE[code]
     url = f"https://discord.com/api/v10/invites/{code}?with_counts=false"
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                if resp.status == 429:
-                    # rate-limited: try reading retry_after then raise to caller
-                    try:
-                        data = await resp.json()
-                        retry = data.get("retry_after", 5)
-                    except:
-                        retry = 5
-                    raise RuntimeError(f"RATE_LIMITED:{retry}")
-                if resp.status != 200:
-                    raise RuntimeError(f"HTTP_{resp.status}")
-                data = await resp.json()
-                INVITE_CACHE[code] = data
-                save_invite_cache()
-                return data
+        async with get_http_session().get(url) as resp:
+            if resp.status == 429:
+                # rate-limited: try reading retry_after then raise to caller
+                try:
+                    data = await resp.json()
+                    retry = data.get("retry_after", 5)
+                except:
+                    retry = 5
+                raise RuntimeError(f"RATE_LIMITED:{retry}")
+            if resp.status != 200:
+                raise RuntimeError(f"HTTP_{resp.status}")
+            data = await resp.json()
+            INVITE_CACHE[code] = data
+            save_invite_cache()
+            return data
     except Exception as e:
         raise
 # main.py - PART 3/3
@@ -249,10 +223,10 @@ async def resolve_invite_code(code: str):
 # ---- /links command ----
 @tree.command(name="links", description="Get scammer private server links! (Developed by h.aze.l)")
 async def links_command(interaction: discord.Interaction):
-    await interaction.response.defer(thinking=True)
-    links = await fetch_group_posts()
+    links = get_snapshot().links
+    revalidate_if_stale()
     if not links:
-        await interaction.followup.send("No roblox.com/share links found 😢", ephemeral=True)
+        await interaction.response.send_message("No roblox.com/share links found 😢", ephemeral=True)
         return
     pretty = [f"[Click Here ({i})]({l})" for i, l in enumerate(links[:10], start=1)]
     message = "\n\n".join(pretty)
@@ -262,16 +236,16 @@ async def links_command(interaction: discord.Interaction):
         message = f"⚠️ The bot is currently in maintenance mode and may experience issues.\n\n{message}"
     embed = discord.Embed(title=title, description=message, color=0x00ffcc if not MAINTENANCE else 0xFFA500)
     embed.set_image(url="https://pbs.twimg.com/media/GvwdBD4XQAAL-u0.jpg")
-    embed.set_footer(text="DM @h.aze.l for bug reports | Made by SAB-RS")
-    await interaction.followup.send(embed=embed)
+    embed.set_footer(text=f"DM @h.aze.l for bug reports | Made by SAB-RS | Links {freshness_text()}")
+    await interaction.response.send_message(embed=embed)
 
 # ---- /onelink command ----
 @tree.command(name="onelink", description="Get the first scammer private server link with a button")
 async def onelink_command(interaction: discord.Interaction):
-    await interaction.response.defer(thinking=True)
-    links = await fetch_group_posts()
+    links = get_snapshot().links
+    revalidate_if_stale()
     if not links:
-        await interaction.followup.send("No roblox.com/share links found 😢", ephemeral=True)
+        await interaction.response.send_message("No roblox.com/share links found 😢", ephemeral=True)
         return
     first_link = links[0]
     view = View()
@@ -279,8 +253,8 @@ async def onelink_command(interaction: discord.Interaction):
     color = 0x00ffcc if not MAINTENANCE else 0xFFA500
     embed = discord.Embed(title="⚠️ Latest SAB Scammer PS Link 🔗", description="Click the button below to visit the link.", color=color)
     embed.set_image(url="https://pbs.twimg.com/media/GvwdBD4XQAAL-u0.jpg")
-    embed.set_footer(text="DM @h.aze.l for bug reports | Made by SAB-RS")
-    await interaction.followup.send(embed=embed, view=view)
+    embed.set_footer(text=f"DM @h.aze.l for bug reports | Made by SAB-RS | Links {freshness_text()}")
+    await interaction.response.send_message(embed=embed, view=view)
 
 # ---- User ban commands ----
 @tree.command(name="ban_user", description="Ban a user (owner-only)")
@@ -514,11 +488,13 @@ async def update_tree(interaction: discord.Interaction):
 # ---- Events ----
 @client.event
 async def on_ready():
+    await open_http_session()
     try:
         await tree.sync()
     except Exception as e:
         print(f"[WARN] sync failed on_ready: {e}")
     print(f"✅ Logged in as {client.user}")
+    start_wall_poller(LINK_MODE)
     print(f"In {len(client.guilds)} guilds.")
     total_members = sum(g.member_count for g in client.guilds if getattr(g, "member_count", None))
     print(f"Reaching approx {total_members} members.")
@@ -538,4 +514,4 @@ async def on_guild_remove(guild):
 if __name__ == "__main__":
     # start flask in background
     threading.Thread(target=run_flask, daemon=True).start()
-    client.run(TOKEN)
+    run_client(client, TOKEN)
@@ -1,9 +1,9 @@
 import os
-import re
 import threading
 import discord
 from discord import app_commands
-import aiohttp
+from http_client import open_http_session, get_http_session, run_client
+from link_extract import unique_links, LOOSE
 from flask import Flask
 
 # ---- Secrets ----
@@ -33,28 +33,13 @@ async def fetch_group_posts():
     url = f"https://groups.roblox.com/v2/groups/{GROUP_ID}/wall/posts?sortOrder=Desc&limit=100"
     headers = {"Cookie": f".ROBLOSECURITY={ROBLOX_COOKIE}"}
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as resp:
-            if resp.status != 200:
-                print(f"⚠️ Failed to fetch posts: {resp.status}")
-                return []
-            data = await resp.json()
+    async with get_http_session().get(url, headers=headers) as resp:
+        if resp.status != 200:
+            print(f"⚠️ Failed to fetch posts: {resp.status}")
+            return []
+        data = await resp.json()
 
-    links = []
-    for post in data.get("data", []):
-        content = post.get("body", "")
-        found = re.findall(r"(https?://[^\s]+roblox\.com/[^\s]*)", content)
-        links.extend(found)
-    
-    # remove duplicates while preserving order
-    seen = set()
-    unique_links = []
-    for link in links:
-        if link not in seen:
-            seen.add(link)
-            unique_links.append(link)
-    
-    return unique_links
+    return unique_links((post.get("body", "") for post in data.get("data", [])), LOOSE)
 
 @tree.command(name="links", description="Get scammer private server links! (Developed by h.aze.l)")
 async def links_command(interaction: discord.Interaction):
@@ -69,6 +54,7 @@ async def links_command(interaction: discord.Interaction):
 
 @client.event
 async def on_ready():
+    await open_http_session()
     await tree.sync()
     print(f"✅ Logged in as {client.user}")
     print("Slash command /links is ready!")
@@ -79,5 +65,5 @@ flask_thread = threading.Thread(target=run_flask)
 flask_thread.start()  # non-daemon to keep alive
 
 # ---- Run Discord bot in main thread ----
-client.run(TOKEN)
+run_client(client, TOKEN)
 
@@ -0,0 +1,78 @@
+# bench_extract.py - link extraction throughput, old per-file regexes vs link_extract
+#
+# Run from the repo root:  python -m benchmarks.bench_extract
+import re
+import time
+import random
+
+from link_extract import find_links, STRICT, LOOSE
+
+OLD_STRICT = re.compile(r"https?://www\.roblox\.com/share(?:[/?][A-Za-z0-9_\-=&?#%]+)?")
+OLD_LOOSE = re.compile(r"(https?://[^\s]+roblox\.com/[^\s]*)")
+
+WORDS = ["join", "server", "scam", "free", "robux", "trade", "pls", "vouch", "legit", "dm"]
+
+
+def make_body(rng):
+    kind = rng.random()
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30)))
+    if kind < 0.25:
+        code = "%032x" % rng.getrandbits(128)
+        return f"{words} https://www.roblox.com/share?code={code}&type=Server {words}"
+    if kind < 0.35:
+        return f"{words} https://www.roblox.com/games/{rng.randint(1, 10**10)}/place {words}"
+    if kind < 0.45:
+        return f"{words} https://example.com/{rng.randint(1, 10**6)} {words}"
+    return words
+
+
+def adversarial_bodies():
+    # long whitespace-free tokens full of scheme prefixes that never reach roblox.com/
+    return [
+        "http://" * 4000,
+        "https://a" * 4000 + "roblox.com",
+        "x" * 50000 + " roblox.com/ " + "https://" * 3000,
+        ("https://www.roblox.com/shar" * 2000) + "roblox.com/",
+    ]
+
+
+def payload(n, rng, adversarial=False):
+    bodies = [make_body(rng) for _ in range(n)]
+    if adversarial:
+        bad = adversarial_bodies()
+        for i in range(0, n, max(1, n // 20)):
+            bodies[i] = bad[i % len(bad)]
+    return bodies
+
+
+def bench(label, fn, bodies, repeat):
+    total_bytes = sum(len(b) for b in bodies) * repeat
+    start = time.perf_counter()
+    found = 0
+    for _ in range(repeat):
+        for b in bodies:
+            found += len(fn(b))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<14} {elapsed * 1000:9.2f} ms  {len(bodies) * repeat / elapsed:12,.0f} posts/s"
+          f"  {total_bytes / elapsed / 1e6:8.1f} MB/s  ({found} links)")
+    return elapsed
+
+
+def main():
+    rng = random.Random(1234)
+    cases = [
+        ("100 posts", payload(100, rng), 200),
+        ("10k posts", payload(10_000, rng), 2),
+        ("100 posts, adversarial", payload(100, rng, adversarial=True), 2),
+        ("10k posts, adversarial", payload(10_000, rng, adversarial=True), 1),
+    ]
+    for name, bodies, repeat in cases:
+        print(f"{name} (x{repeat})")
+        bench("old strict", OLD_STRICT.findall, bodies, repeat)
+        bench("new strict", lambda b: find_links(b, STRICT), bodies, repeat)
+        bench("old loose", OLD_LOOSE.findall, bodies, repeat)
+        bench("new loose", lambda b: find_links(b, LOOSE), bodies, repeat)
+
+
+if __name__ == "__main__":
+    main()
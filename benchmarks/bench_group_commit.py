@@ -0,0 +1,69 @@
+# bench_group_commit.py - a guild-leave storm with and without group commit
+#
+# Run from the repo root:
+#   python -m benchmarks.bench_group_commit --removals 1000 --synchronous FULL
+#
+# Fires `removals` concurrent add_removed_guild() calls (what on_guild_remove
+# does for each guild after an outage) and times until every caller has its
+# commit acknowledgment. DB_GROUP_COMMIT_MAX=1 is the one-commit-per-mutation
+# baseline.
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+
+async def storm(bot, db, label, group_max, args):
+    db.DB_GROUP_COMMIT_MAX = group_max
+    before = db.group_commit_stats()
+    acks = []
+
+    async def remove(i):
+        start = time.perf_counter()
+        await bot.add_removed_guild(10**17 + i, f"guild {i}")
+        acks.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(remove(i) for i in range(args.removals)))
+    elapsed = time.perf_counter() - start
+    after = db.group_commit_stats()
+    groups = after["groups"] - before["groups"]
+    acks.sort()
+    print(f"{label}")
+    print(f"  {args.removals} removals in {elapsed * 1000:.1f} ms = {args.removals / elapsed:,.0f}/s")
+    print(f"  commits {groups} (avg {args.removals / max(groups, 1):.1f} per commit)")
+    print(f"  ack latency  p50 {acks[len(acks) // 2] * 1000:.1f} ms  p99 {acks[int(len(acks) * 0.99)] * 1000:.1f} ms"
+          f"  mean {statistics.mean(acks) * 1000:.1f} ms")
+    return elapsed
+
+
+async def run(args):
+    import main as bot
+    import db
+
+    base = await storm(bot, db, "one commit per mutation (DB_GROUP_COMMIT_MAX=1)", 1, args)
+    grouped = await storm(bot, db, f"group commit (max {args.group_max}, window {db.DB_GROUP_COMMIT_WINDOW * 1000:.0f} ms)",
+                          args.group_max, args)
+    rows = await db.db_fetchone("SELECT COUNT(*) AS c FROM removed_guilds")
+    print(f"speedup: {base / grouped:.1f}x  (rows logged: {rows['c']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark group commit under a guild-removal burst")
+    parser.add_argument("--removals", type=int, default=1000)
+    parser.add_argument("--group-max", type=int, default=256)
+    parser.add_argument("--synchronous", default="NORMAL", choices=("OFF", "NORMAL", "FULL"))
+    args = parser.parse_args()
+    if "main" in sys.modules:
+        sys.exit("run as a fresh process: python -m benchmarks.bench_group_commit")
+    tmp = tempfile.mkdtemp(prefix="bench_group_")
+    os.environ["SQLITE_DB"] = os.path.join(tmp, "bench.db")
+    os.environ["DB_SYNCHRONOUS"] = args.synchronous
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# bench_import.py - import a large legacy ban list with import_legacy.py
+#
+# Run from the repo root:  python -m benchmarks.bench_import --bans 1000000
+#
+# Writes a banned_users.json the way the JSON bots do (save_json, indent=2),
+# mixing their entry shapes: Personal_Client/mirror dicts with float
+# timestamps, ban.py dicts without one, and bare ids. The file is imported
+# into a fresh database and then imported again to time the idempotent re-run.
+# Peak RSS shows the file is streamed rather than loaded.
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+
+
+def write_bans(path, n):
+    # element by element, laid out as json.dump(..., indent=2) would, so the
+    # generator doesn't set the peak RSS; bans are appended, so timestamps rise
+    rng = random.Random(1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i in range(n):
+            uid = 10**17 + i
+            kind = i % 3
+            if kind == 0:
+                entry = {"id": uid, "reason": f"reason {i}", "timestamp": 1.7e9 + i * 10 + rng.random()}
+            elif kind == 1:
+                entry = {"id": uid, "reason": f"reason {i}"}
+            else:
+                entry = uid
+            f.write(("," if i else "") + "\n  " + json.dumps(entry, indent=2).replace("\n", "\n  "))
+        f.write("\n]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming JSON -> SQLite importer")
+    parser.add_argument("--bans", type=int, default=1000000)
+    parser.add_argument("--batch", type=int, default=100000)
+    args = parser.parse_args()
+    if "db" in sys.modules:
+        sys.exit("run as a fresh process: python -m benchmarks.bench_import")
+    tmp = tempfile.mkdtemp(prefix="bench_import_")
+    os.environ["SQLITE_DB"] = os.path.join(tmp, "bench.db")
+    src = os.path.join(tmp, "banned_users.json")
+    write_bans(src, args.bans)
+    print(f"banned_users.json: {args.bans:,} entries, {os.path.getsize(src) / 2**20:.0f} MiB")
+
+    from migrations import run_migrations
+    from import_legacy import Importer
+    from db import db_read
+    run_migrations()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for label in ("first import", "re-run"):
+        start = time.perf_counter()
+        Importer(tmp, args.batch).banned_users()
+        took = time.perf_counter() - start
+        print(f"{label}: {took:.2f}s = {args.bans / took:,.0f} entries/s")
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rows = db_read("SELECT COUNT(*) AS c FROM banned_users", fetchone=True)["c"]
+    print(f"rows: {rows:,}  peak RSS growth during import: {(rss_after - rss_before) / 1024:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
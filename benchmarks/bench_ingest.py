@@ -0,0 +1,135 @@
+# bench_ingest.py - drive the real roblox_wall ingestion against the local stand-in
+#
+# Run from the repo root:
+#   python -m benchmarks.bench_ingest --groups 3 --cycles 200 --latency-ms 20
+#
+# Reports requests/sec, p50/p99 fetch latency, bytes parsed and extraction
+# throughput for a cold pass (full pages every cycle) and a warm pass (the
+# normal incremental path, with new posts trickling in).
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+from benchmarks.wall_standin import StandinWall, start_standin
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def report(label, elapsed, latencies, wall_before, wall_after, extract_posts, extract_time):
+    requests = len(latencies)
+    parsed = wall_after["bytes"] - wall_before["bytes"]
+    print(f"{label}")
+    print(f"  requests       {requests} in {elapsed:.2f}s = {requests / elapsed:,.1f} req/s")
+    if latencies:
+        print(f"  fetch latency  p50 {percentile(latencies, 50) * 1000:.1f} ms"
+              f"  p99 {percentile(latencies, 99) * 1000:.1f} ms"
+              f"  mean {statistics.mean(latencies) * 1000:.1f} ms")
+    print(f"  bytes parsed   {parsed:,} ({parsed / max(requests, 1):,.0f} per request)")
+    print(f"  304 / unchanged pages  {wall_after['not_modified'] - wall_before['not_modified']}"
+          f" / {wall_after['digest_hits'] - wall_before['digest_hits']}")
+    if extract_time:
+        print(f"  extraction     {extract_posts:,} posts in {extract_time * 1000:.1f} ms"
+              f" = {extract_posts / extract_time:,.0f} posts/s")
+
+
+async def run(args):
+    wall = StandinWall(posts=args.posts, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                       rate_429=args.rate_429, rate_5xx=args.rate_5xx)
+    runner, base_url = await start_standin(wall)
+
+    state_dir = tempfile.mkdtemp(prefix="bench_ingest_")
+    os.environ["ROBLOX_GROUPS_API"] = base_url
+    os.environ["GROUP_IDS"] = ",".join(str(g) for g in range(1, args.groups + 1))
+    os.environ["WALL_STATE_FILE"] = os.path.join(state_dir, "wall_state.json")
+    import roblox_wall
+    import http_client
+
+    latencies = []
+    real_fetch = roblox_wall.fetch_wall_page
+
+    async def timed_fetch(*a, **kw):
+        start = time.perf_counter()
+        try:
+            return await real_fetch(*a, **kw)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    roblox_wall.fetch_wall_page = timed_fetch
+
+    real_extract = roblox_wall.extract_links
+    extract = {"posts": 0, "time": 0.0}
+
+    def timed_extract(posts, mode):
+        start = time.perf_counter()
+        try:
+            return real_extract(posts, mode)
+        finally:
+            extract["time"] += time.perf_counter() - start
+            extract["posts"] += len(posts)
+
+    roblox_wall.extract_links = timed_extract
+
+    async def cycle():
+        try:
+            await roblox_wall.refresh_snapshot(args.mode)
+        except roblox_wall.WallRateLimited:
+            pass
+
+    try:
+        for label, warm in (("cold (full page every cycle)", False), ("warm (incremental)", True)):
+            latencies.clear()
+            extract.update(posts=0, time=0.0)
+            roblox_wall._state.clear()
+            roblox_wall._page_cache.clear()
+            roblox_wall._post_links.clear()
+            roblox_wall._retry_at.clear()
+            before = roblox_wall.wall_stats()
+            start = time.perf_counter()
+            for i in range(args.cycles):
+                if not warm:
+                    roblox_wall._state.clear()
+                    roblox_wall._page_cache.clear()
+                    roblox_wall._post_links.clear()
+                elif args.new_every and i % args.new_every == 0:
+                    for group_id in list(wall.groups):
+                        wall.add_posts(group_id, 1)
+                await cycle()
+            elapsed = time.perf_counter() - start
+            report(label, elapsed, latencies, before, roblox_wall.wall_stats(),
+                   extract["posts"], extract["time"])
+        print(f"stand-in responses: {wall.responses}")
+        print(f"http pool: {http_client.http_stats()}")
+    finally:
+        await http_client.close_http_session()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark roblox_wall ingestion against the stand-in")
+    parser.add_argument("--groups", type=int, default=1)
+    parser.add_argument("--posts", type=int, default=300)
+    parser.add_argument("--cycles", type=int, default=100)
+    parser.add_argument("--new-every", type=int, default=5, help="add a post per group every N warm cycles")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--mode", default="strict", choices=("strict", "loose"))
+    args = parser.parse_args()
+    if "roblox_wall" in sys.modules:
+        sys.exit("run as a fresh process: python -m benchmarks.bench_ingest")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# bench_loop_block.py - how long main.py's DB work blocks the asyncio loop
+#
+# Run from the repo root:
+#   python -m benchmarks.bench_loop_block --interactions 2000 --synchronous FULL
+#
+# Each simulated interaction does what a command does against the DB: the user
+# ban, tempban and guild ban checks plus one logged write. "sync" runs them with
+# db_exec on the loop (how handlers worked before), "async" awaits the db.py
+# API. A ticker coroutine sleeping 1 ms records how late the loop wakes it.
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+async def measure(label, interaction, args):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(max(0.0, time.perf_counter() - start - 0.001))
+
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def one(i):
+        async with sem:
+            await interaction(i)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.interactions)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    print(f"{label}")
+    print(f"  {args.interactions} interactions in {elapsed:.2f}s = {args.interactions / elapsed:,.0f}/s")
+    print(f"  loop lag  p50 {percentile(lags, 50) * 1000:.2f} ms  p99 {percentile(lags, 99) * 1000:.2f} ms"
+          f"  max {max(lags) * 1000:.2f} ms  mean {statistics.mean(lags) * 1000:.2f} ms")
+    print(f"  ticks {len(lags)} (ideal ~{elapsed / 0.001:,.0f})")
+
+
+async def run(args):
+    import main as bot
+    from db import db_exec
+
+    def sync_interaction_body(i):
+        uid, gid = 1000 + i % 50, 2000 + i % 50
+        now = int(time.time())
+        db_exec("SELECT * FROM banned_users WHERE id=? LIMIT 1", (uid,), fetchone=True)
+        db_exec("DELETE FROM temp_bans WHERE expires <= ?", (now,), commit=True)
+        db_exec("SELECT * FROM temp_bans WHERE id=? LIMIT 1", (uid,), fetchone=True)
+        db_exec("SELECT * FROM banned_guilds WHERE id=? LIMIT 1", (gid,), fetchone=True)
+        db_exec("INSERT INTO removed_guilds (id, name, timestamp) VALUES (?, ?, ?)", (gid, "bench", now), commit=True)
+
+    async def sync_interaction(i):
+        sync_interaction_body(i)
+        await asyncio.sleep(0)
+
+    async def async_interaction(i):
+        uid, gid = 1000 + i % 50, 2000 + i % 50
+        await bot.find_banned_user_entry(uid)
+        await bot.get_tempban(uid)
+        await bot.find_banned_guild_entry(gid)
+        await bot.add_removed_guild(gid, "bench")
+
+    await measure("sync db_exec on the loop (before)", sync_interaction, args)
+    await measure("async db.py API (after)", async_interaction, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure event-loop blocking from DB calls")
+    parser.add_argument("--interactions", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--synchronous", default="NORMAL", choices=("OFF", "NORMAL", "FULL"))
+    args = parser.parse_args()
+    if "main" in sys.modules:
+        sys.exit("run as a fresh process: python -m benchmarks.bench_loop_block")
+    tmp = tempfile.mkdtemp(prefix="bench_loop_")
+    os.environ["SQLITE_DB"] = os.path.join(tmp, "bench.db")
+    os.environ["DB_SYNCHRONOUS"] = args.synchronous
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
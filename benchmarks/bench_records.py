@@ -0,0 +1,71 @@
+# bench_records.py - per-lookup cost of sqlite3.Row -> dict vs records.py classes
+#
+# Run from the repo root:  python -m benchmarks.bench_records --lookups 50000
+#
+# "dict" is how find_banned_user_entry worked before: SELECT *, a sqlite3.Row,
+# then a fresh dict (using r["gban"], since the old r.get() raised). "record"
+# is the current path: fixed column list, tuple rows, a BannedUser instance.
+# Latency is timed with no results kept; memory is what N retained results
+# cost, measured with tracemalloc.
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark row-to-dict vs __slots__ records")
+    parser.add_argument("--lookups", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+    if "main" in sys.modules:
+        sys.exit("run as a fresh process: python -m benchmarks.bench_records")
+    tmp = tempfile.mkdtemp(prefix="bench_records_")
+    os.environ["SQLITE_DB"] = os.path.join(tmp, "bench.db")
+    import main  # noqa: F401  (creates the schema)
+    from db import transaction, reader, db_read_records
+    from records import BannedUser, SELECT_BANNED_USER
+
+    with transaction() as cur:
+        cur.executemany("INSERT INTO banned_users (id, reason, timestamp, no_appeal, gban) VALUES (?, ?, ?, ?, ?)",
+                        [(i, f"reason {i}", 1700000000 + i, i % 2, i % 3 == 0) for i in range(args.users)])
+
+    def dict_lookup(uid):
+        with reader() as conn:
+            r = conn.execute("SELECT * FROM banned_users WHERE id=? LIMIT 1", (uid,)).fetchone()
+        if not r:
+            return None
+        return {
+            "id": r["id"],
+            "reason": r["reason"],
+            "timestamp": r["timestamp"],
+            "no_appeal": bool(r["no_appeal"]),
+            "gban": bool(r["gban"]),
+        }
+
+    def record_lookup(uid):
+        return db_read_records(BannedUser, SELECT_BANNED_USER, (uid,), True)
+
+    n = args.lookups
+    for label, lookup in (("dict (sqlite3.Row -> dict)", dict_lookup), ("record (__slots__)", record_lookup)):
+        for uid in range(min(n, 1000)):
+            lookup(uid % args.users)  # warm statement cache and pages
+        start = time.perf_counter()
+        for i in range(n):
+            lookup(i % args.users)
+        per = (time.perf_counter() - start) / n
+
+        tracemalloc.start()
+        kept = [lookup(i % args.users) for i in range(10000)]
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del kept
+        print(f"{label}")
+        print(f"  {per * 1e6:.2f} us per lookup ({n:,} lookups)")
+        print(f"  {retained / 10000:.0f} bytes retained per result, peak {peak / 1024:.0f} KiB for 10k")
+
+
+if __name__ == "__main__":
+    main()
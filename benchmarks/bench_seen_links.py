@@ -0,0 +1,63 @@
+# bench_seen_links.py - per-link add_seen_link vs batched add_seen_links
+#
+# Run from the repo root:
+#   python -m benchmarks.bench_seen_links --guilds 20 --batch 100 --rounds 5
+#
+# Each round gives every guild a fresh batch of new links (what one ingest
+# hands record_new_links). Uses an on-disk database so commit/fsync cost is
+# included, which is most of the difference.
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+
+def make_batch(guild, round_no, size):
+    return [f"https://www.roblox.com/share?code=g{guild}r{round_no}n{i}&type=Server" for i in range(size)]
+
+
+def run(bot, label, record, args):
+    per_batch = []
+    for r in range(args.rounds):
+        for g in range(args.guilds):
+            links = make_batch(g, r, args.batch)
+            start = time.perf_counter()
+            record(g + 1, links)
+            per_batch.append(time.perf_counter() - start)
+    total = sum(per_batch)
+    inserted = len(per_batch) * args.batch
+    print(f"{label}")
+    print(f"  {inserted:,} links in {total:.2f}s = {inserted / total:,.0f} links/s")
+    print(f"  per batch of {args.batch}: mean {statistics.mean(per_batch) * 1000:.2f} ms"
+          f"  max {max(per_batch) * 1000:.2f} ms")
+    print(f"  rows kept for guild 1: {bot.count_seen_links_for_guild(1)}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark seen_links recording paths")
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    if "main" in sys.modules:
+        sys.exit("run as a fresh process: python -m benchmarks.bench_seen_links")
+
+    tmp = tempfile.mkdtemp(prefix="bench_seen_")
+    os.environ["SQLITE_DB"] = os.path.join(tmp, "bench.db")
+    import main as bot
+
+    def per_link(gid, links):
+        for link in links:
+            bot.add_seen_link(link, gid)
+
+    old = run(bot, "per link (add_seen_link)", per_link, args)
+    bot.db_exec("DELETE FROM seen_links", commit=True)
+    new = run(bot, "batched (add_seen_links)", bot.add_seen_links, args)
+    print(f"speedup: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
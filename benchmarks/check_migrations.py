@@ -0,0 +1,272 @@
+# check_migrations.py - upgrade a database from every earlier schema and check it
+#
+# Run from the repo root:  python -m benchmarks.check_migrations
+#
+# Builds throwaway databases in each layout main.py has shipped, fills them
+# with a few rows, runs migrations.run_migrations() on each in a fresh process
+# (db.py opens its connections at import), and fails (exit 1) unless every one
+# ends at SCHEMA_VERSION with the expected indexes, planner statistics and all
+# of its rows, and a second run is a no-op. A migration that fails partway must
+# leave the database exactly as it was, so the retry still finds everything.
+import os
+import sys
+import sqlite3
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASE_TABLES = [
+    "CREATE TABLE banned_guilds (id INTEGER PRIMARY KEY, name TEXT, reason TEXT, timestamp INTEGER, no_appeal INTEGER DEFAULT 0)",
+    "CREATE TABLE removed_guilds (id INTEGER, name TEXT, timestamp INTEGER)",
+    "CREATE TABLE banned_users (id INTEGER PRIMARY KEY, reason TEXT, timestamp INTEGER, no_appeal INTEGER DEFAULT 0, gban INTEGER DEFAULT 0)",
+    "CREATE TABLE temp_bans (id INTEGER PRIMARY KEY, expires INTEGER, reason TEXT, no_appeal INTEGER DEFAULT 0, gban INTEGER DEFAULT 0)",
+]
+SUBSCRIPTIONS_TABLE = "CREATE TABLE link_subscriptions (guild_id INTEGER PRIMARY KEY, channel_id INTEGER, created INTEGER)"
+
+# (guild_id, link as the bot stored it, first_seen): raw share URLs, two of
+# them spellings of one link, and one that isn't a usable URL at all. The
+# original layout keyed seen_links on the link alone, so its fixture can't
+# repeat a link across guilds.
+RAW = [
+    (1, "https://www.roblox.com/share?code=a&type=Server", 100),
+    (1, "https://roblox.com/share?type=Server&code=a", 150),
+    (1, "https://www.roblox.com/share?code=b&type=Server", 200),
+    (2, "https://www.roblox.com/share?code=c&type=Server", 300),
+    (2, "https://[broken", 350),
+]
+RAW_SHARED = RAW + [(2, "https://www.roblox.com/share?code=a&type=Server", 400)]
+# what the migrations must leave: canonical keys, one row per guild and key
+# with its earliest first_seen, and nothing for the broken link
+SEEN = [(1, "share:a:server", 100), (1, "share:b:server", 200), (2, "share:c:server", 300)]
+SEEN_SHARED = SEEN + [(2, "share:a:server", 400)]
+
+EXPECTED_INDEXES = {
+    "idx_seen_links_guild_first_seen", "idx_temp_bans_expires", "idx_banned_users_timestamp",
+    "idx_banned_guilds_timestamp", "idx_removed_guilds_timestamp", "idx_seen_links_link",
+}
+
+
+def fill_base(conn, subscriptions=True):
+    conn.execute("INSERT INTO banned_guilds VALUES (10, 'g', 'spam', 1000, 1)")
+    conn.execute("INSERT INTO removed_guilds VALUES (11, 'left', 1001)")
+    conn.execute("INSERT INTO removed_guilds VALUES (11, 'left again', 1002)")
+    conn.execute("INSERT INTO banned_users VALUES (20, 'raid', 1003, 0, 1)")
+    conn.execute("INSERT INTO temp_bans VALUES (21, 4102444800, 'cool off', 0, 0)")
+    if subscriptions:
+        conn.execute("INSERT INTO link_subscriptions VALUES (1, 30, 1004)")
+
+
+def v0_original(conn):
+    # the first SQLite layout
+    for stmt in BASE_TABLES:
+        conn.execute(stmt)
+    conn.execute("CREATE TABLE seen_links (link TEXT PRIMARY KEY, guild_id INTEGER, first_seen INTEGER)")
+    fill_base(conn, subscriptions=False)
+    conn.executemany("INSERT INTO seen_links (guild_id, link, first_seen) VALUES (?, ?, ?)", RAW)
+    return SEEN
+
+
+def v0_per_guild(conn):
+    # seen_links keyed on (guild_id, link) text
+    for stmt in BASE_TABLES + [SUBSCRIPTIONS_TABLE]:
+        conn.execute(stmt)
+    conn.execute("""CREATE TABLE seen_links (guild_id INTEGER NOT NULL, link TEXT NOT NULL, first_seen INTEGER NOT NULL,
+                    PRIMARY KEY (guild_id, link)) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX idx_seen_links_guild_first_seen ON seen_links (guild_id, first_seen)")
+    fill_base(conn)
+    conn.executemany("INSERT INTO seen_links (guild_id, link, first_seen) VALUES (?, ?, ?)", RAW_SHARED)
+    return SEEN_SHARED
+
+
+def v0_interned(conn):
+    # links interned into their own table, before versioning
+    for stmt in BASE_TABLES + [SUBSCRIPTIONS_TABLE]:
+        conn.execute(stmt)
+    conn.execute("CREATE TABLE links (id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE, first_seen INTEGER NOT NULL)")
+    conn.execute("""CREATE TABLE seen_links (guild_id INTEGER NOT NULL, link_id INTEGER NOT NULL, first_seen INTEGER NOT NULL,
+                    PRIMARY KEY (guild_id, link_id)) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX idx_seen_links_guild_first_seen ON seen_links (guild_id, first_seen)")
+    fill_base(conn)
+    _insert_interned(conn, RAW_SHARED)
+    return SEEN_SHARED
+
+
+def _insert_interned(conn, seen):
+    for gid, url, first_seen in seen:
+        conn.execute("INSERT OR IGNORE INTO links (url, first_seen) VALUES (?, ?)", (url, first_seen))
+        conn.execute("INSERT INTO seen_links SELECT ?, id, ? FROM links WHERE url=?", (gid, first_seen, url))
+
+
+def at_version(version):
+    def build(conn):
+        upgrade(conn.path, version)
+        fill_base(conn)
+        if version >= 2:
+            _insert_interned(conn, RAW_SHARED)
+            return SEEN_SHARED
+        return []
+    build.__name__ = f"v{version}"
+    return build
+
+
+def empty(conn):
+    return []
+
+
+def failing_after(marker, version, fixture):
+    """fixture, upgraded to just before `version`, then a run of `version` that
+    dies right after marker's statement and must leave no trace."""
+    def build(conn):
+        seen = fixture(conn)
+        conn.commit()
+        upgrade(conn.path, to=version - 1)
+        before = schema(conn)
+        upgrade(conn.path, fail_after=marker)
+        if schema(conn) != before:
+            raise RuntimeError(f"failed migration {version} left the schema changed after {marker!r}")
+        return seen
+    build.__name__ = f"{fixture.__name__}+fail{version}"
+    return build
+
+
+def schema(conn):
+    return (conn.execute("PRAGMA user_version").fetchone()[0],
+            sorted(conn.execute("SELECT type, name, sql FROM sqlite_master")))
+
+
+FIXTURES = [empty, v0_original, v0_per_guild, v0_interned, at_version(1), at_version(2), at_version(3),
+            # the seen_links rebuild, between renaming the old table and copying it
+            failing_after("RENAME TO seen_links_old", 2, v0_per_guild),
+            failing_after("RENAME TO seen_links_old", 2, v0_original),
+            # after some of the indexes already exist
+            failing_after("idx_banned_users_timestamp", 3, at_version(2))]
+
+
+class _Conn(sqlite3.Connection):
+    path = None
+
+
+def upgrade(path, to=None, fail_after=None):
+    """Run the migrations on `path` in a fresh process; returns the versions applied.
+
+    With fail_after, the run raises right after the first statement containing
+    that text and this returns None.
+    """
+    cmd = [sys.executable, "-m", "benchmarks.check_migrations", "--upgrade", path]
+    if to is not None:
+        cmd += ["--to", str(to)]
+    if fail_after is not None:
+        cmd += ["--fail-after", fail_after]
+    env = dict(os.environ, SQLITE_DB=path)
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, check=fail_after is None)
+    if fail_after is not None:
+        if "injected failure" not in proc.stderr:
+            raise RuntimeError(f"expected an injected failure after {fail_after!r}:\n{proc.stdout}{proc.stderr}")
+        return None
+    applied = proc.stdout.splitlines()[-1].removeprefix("applied:")
+    return [int(v) for v in applied.split(",") if v]
+
+
+class _FailAfter:
+    """Migration cursor that raises once a statement containing `marker` has run."""
+
+    def __init__(self, cur, marker):
+        self._cur = cur
+        self._marker = marker
+
+    def execute(self, query, params=()):
+        result = self._cur.execute(query, params)
+        if self._marker in query:
+            raise RuntimeError(f"injected failure after {query.strip()!r}")
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+def run_upgrade(to, fail_after):
+    import migrations
+    if to is not None:
+        migrations.MIGRATIONS = [m for m in migrations.MIGRATIONS if m[0] <= to]
+        migrations.SCHEMA_VERSION = to
+    if fail_after is not None:
+        def failing(migrate):
+            return lambda cur: migrate(_FailAfter(cur, fail_after))
+        migrations.MIGRATIONS = [(v, failing(m)) for v, m in migrations.MIGRATIONS]
+    print("applied:" + ",".join(str(v) for v in migrations.run_migrations()))
+
+
+def counts(conn):
+    tables = ("banned_guilds", "removed_guilds", "banned_users", "temp_bans", "link_subscriptions")
+    present = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    return {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] if t in present else 0 for t in tables}
+
+
+def check(fixture, tmp, latest):
+    path = os.path.join(tmp, f"{fixture.__name__}.db")
+    conn = sqlite3.connect(path, factory=_Conn)
+    conn.path = path
+    try:
+        seen = fixture(conn)
+    except RuntimeError as e:
+        print(f"FAIL {fixture.__name__:<18} {e}")
+        return False
+    conn.commit()
+    before = counts(conn)
+    conn.close()
+
+    problems = []
+    applied = upgrade(path)
+    again = upgrade(path)
+    conn = sqlite3.connect(path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != latest:
+        problems.append(f"user_version {version}, expected {latest}")
+    if again:
+        problems.append(f"second run applied {again}")
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    if EXPECTED_INDEXES - indexes:
+        problems.append(f"missing indexes {sorted(EXPECTED_INDEXES - indexes)}")
+    if not conn.execute("SELECT name FROM sqlite_master WHERE name='sqlite_stat1'").fetchone():
+        problems.append("ANALYZE did not run")
+    after = counts(conn)
+    if after != before:
+        problems.append(f"row counts changed {before} -> {after}")
+    got = sorted(conn.execute("SELECT s.guild_id, l.url, s.first_seen FROM seen_links s JOIN links l ON l.id = s.link_id"))
+    if got != sorted(seen):
+        problems.append(f"seen links {got}, expected {sorted(seen)}")
+    urls = sorted(r[0] for r in conn.execute("SELECT url FROM links"))
+    if urls != sorted({url for _, url, _ in seen}):
+        problems.append(f"links.url {urls}, expected the canonical keys of the seen links only")
+    if conn.execute("PRAGMA integrity_check").fetchone()[0] != "ok":
+        problems.append("integrity_check failed")
+    conn.close()
+
+    print(f"{'ok  ' if not problems else 'FAIL'} {fixture.__name__:<18} applied {applied or 'nothing'}")
+    for problem in problems:
+        print(f"       {problem}")
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check schema migrations from every earlier layout")
+    parser.add_argument("--upgrade", metavar="DB", help=argparse.SUPPRESS)
+    parser.add_argument("--to", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--fail-after", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sys.path.insert(0, ROOT)
+    if args.upgrade:
+        run_upgrade(args.to, args.fail_after)
+        return
+    tmp = tempfile.mkdtemp(prefix="migrations_")
+    # importing migrations here would open db.py's connections in this process
+    latest = max(upgrade(os.path.join(tmp, "latest.db")))
+    failed = sum(not check(fixture, tmp, latest) for fixture in FIXTURES)
+    if failed:
+        sys.exit(f"{failed} upgrade path(s) failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# check_query_plans.py - assert the hot queries stay on their indexes
+#
+# Run from the repo root:  python -m benchmarks.check_query_plans
+#
+# Builds a throwaway database through main.py's own schema/migration code and
+# fails (exit 1) if any query falls back to a table scan or a temp b-tree sort.
+# The full listings may walk a whole index in order; nothing may scan a table.
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from records import SELECT_TEMPBAN, SELECT_BANNED_USERS, SELECT_BANNED_GUILDS, SELECT_REMOVED_GUILDS  # noqa: E402
+
+# a (guild_id, link_id) seek; idx_seen_links_link carries guild_id too, being
+# on a WITHOUT ROWID table, so the planner may use either
+SEEN_PAIR = ("USING PRIMARY KEY (guild_id=? AND link_id=?)", "idx_seen_links_link (link_id=? AND guild_id=?)")
+
+# (query, params, substring the plan must contain, or a tuple of acceptable ones)
+PLANS = [
+    ("SELECT 1 FROM links l JOIN seen_links s ON s.guild_id=? AND s.link_id=l.id WHERE l.url=? LIMIT 1",
+     (1, "share:x:server"), SEEN_PAIR),
+    ("SELECT l.url FROM links l JOIN seen_links s ON s.guild_id=? AND s.link_id=l.id WHERE l.url IN (?, ?)",
+     (1, "share:x:server", "share:y:server"), SEEN_PAIR),
+    ("SELECT l.url FROM seen_links s JOIN links l ON l.id = s.link_id WHERE s.guild_id=? ORDER BY s.first_seen DESC",
+     (1,), "COVERING INDEX idx_seen_links_guild_first_seen"),
+    ("SELECT COUNT(*) as c FROM seen_links WHERE guild_id=?",
+     (1,), "COVERING INDEX idx_seen_links_guild_first_seen"),
+    ("SELECT first_seen, link_id FROM seen_links WHERE guild_id=? ORDER BY first_seen DESC, link_id DESC LIMIT 1 OFFSET ?",
+     (1, 500), "COVERING INDEX idx_seen_links_guild_first_seen"),
+    ("DELETE FROM seen_links WHERE guild_id=? AND (first_seen, link_id) <= (?, ?)",
+     (1, 0, 0), "INDEX idx_seen_links_guild_first_seen (guild_id=? AND (first_seen,link_id)<"),
+    ("SELECT guild_id FROM seen_links WHERE guild_id >= ? ORDER BY guild_id LIMIT 1",
+     (0,), "COVERING INDEX idx_seen_links_guild_first_seen (guild_id>?)"),
+    ("SELECT first_seen, link_id FROM seen_links WHERE guild_id=? ORDER BY first_seen, link_id LIMIT 1 OFFSET ?",
+     (1, 1999), "COVERING INDEX idx_seen_links_guild_first_seen"),
+    ("SELECT id FROM links WHERE id > ? ORDER BY id LIMIT 1 OFFSET ?",
+     (0, 1999), "USING INTEGER PRIMARY KEY (rowid>?)"),
+    ("DELETE FROM links WHERE id > ? AND id <= ? AND NOT EXISTS (SELECT 1 FROM seen_links WHERE link_id = links.id)",
+     (0, 2000), "COVERING INDEX idx_seen_links_link (link_id=?)"),
+    ("DELETE FROM temp_bans WHERE expires <= ?",
+     (0,), "INDEX idx_temp_bans_expires (expires<?)"),
+    (SELECT_TEMPBAN, (1, 0), "USING INTEGER PRIMARY KEY (rowid=?)"),
+    (SELECT_BANNED_USERS, (), "INDEX idx_banned_users_timestamp"),
+    (SELECT_BANNED_GUILDS, (), "INDEX idx_banned_guilds_timestamp"),
+    (SELECT_REMOVED_GUILDS, (), "INDEX idx_removed_guilds_timestamp"),
+]
+
+
+def main():
+    if "main" in sys.modules:
+        sys.exit("run as a fresh process: python -m benchmarks.check_query_plans")
+    tmp = tempfile.mkdtemp(prefix="plans_")
+    os.environ["SQLITE_DB"] = os.path.join(tmp, "plans.db")
+    import main  # noqa: F401  (creates/migrates the schema)
+    from db import db_read
+
+    failed = 0
+    for query, params, expect in PLANS:
+        plan = [row["detail"] for row in db_read("EXPLAIN QUERY PLAN " + query, params)]
+        expect = (expect,) if isinstance(expect, str) else expect
+        ok = (any(e in line for line in plan for e in expect)
+              and not any("TEMP B-TREE" in line or (line.startswith("SCAN") and "INDEX" not in line)
+                            for line in plan))
+        failed += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {query}")
+        for line in plan:
+            print(f"       {line}")
+    if failed:
+        sys.exit(f"{failed} query plan(s) regressed")
+
+
+if __name__ == "__main__":
+    main()
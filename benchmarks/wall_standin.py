@@ -0,0 +1,157 @@
+# wall_standin.py - local stand-in for groups.roblox.com/v2/groups/{id}/wall/posts
+#
+# Serves generated wall posts with cursor paging, optional latency and injected
+# 429 / 5xx responses, so ingestion can be tested and benchmarked without
+# GROUP_ID / ROBLOX_COOKIE. Point a bot at it with
+#   ROBLOX_GROUPS_API=http://127.0.0.1:8090 GROUP_IDS=1,2 python main.py
+#
+# Standalone:  python -m benchmarks.wall_standin --port 8090 --posts 500 --latency-ms 40
+import asyncio
+import random
+import argparse
+from datetime import datetime, timezone, timedelta
+
+from aiohttp import web
+
+WORDS = ["join", "server", "scam", "free", "robux", "trade", "pls", "vouch", "legit", "dm"]
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class StandinWall:
+    """Generated posts per group plus the fault-injection knobs."""
+
+    def __init__(self, posts=300, link_ratio=0.3, latency_ms=0.0, jitter_ms=0.0,
+                 rate_429=0.0, rate_5xx=0.0, retry_after=2, seed=1):
+        self.rng = random.Random(seed)
+        self.link_ratio = link_ratio
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self.initial_posts = posts
+        self.groups = {}
+        self.next_id = 1
+        self.requests = 0
+        self.responses = {}
+
+    def _body(self):
+        words = " ".join(self.rng.choice(WORDS) for _ in range(self.rng.randint(4, 40)))
+        if self.rng.random() < self.link_ratio:
+            code = "%032x" % self.rng.getrandbits(128)
+            return f"{words} https://www.roblox.com/share?code={code}&type=Server {words}"
+        return words
+
+    def _group(self, group_id):
+        posts = self.groups.get(group_id)
+        if posts is None:
+            posts = self.groups[group_id] = []
+            self.add_posts(group_id, self.initial_posts)
+        return posts
+
+    def add_posts(self, group_id, n):
+        """Append n new posts (newer than everything so far) to a group's wall."""
+        posts = self.groups.setdefault(group_id, [])
+        for _ in range(n):
+            pid = self.next_id
+            self.next_id += 1
+            created = EPOCH + timedelta(seconds=pid)
+            posts.append({
+                "id": pid,
+                "poster": {"user": {"userId": self.rng.randint(1, 10**9), "username": "standin"}},
+                "body": self._body(),
+                "created": created.isoformat().replace("+00:00", "Z"),
+                "updated": created.isoformat().replace("+00:00", "Z"),
+            })
+
+    def _count(self, status):
+        self.responses[status] = self.responses.get(status, 0) + 1
+
+    async def handle_posts(self, request):
+        self.requests += 1
+        delay = self.latency_ms + self.rng.uniform(0, self.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        roll = self.rng.random()
+        if roll < self.rate_429:
+            self._count(429)
+            return web.json_response(
+                {"errors": [{"code": 0, "message": "Too many requests"}]},
+                status=429, headers={"Retry-After": str(self.retry_after)},
+            )
+        if roll < self.rate_429 + self.rate_5xx:
+            self._count(503)
+            return web.json_response({"errors": [{"code": 0, "message": "Service unavailable"}]}, status=503)
+
+        try:
+            limit = int(request.query.get("limit", "10"))
+        except ValueError:
+            limit = 0
+        if limit not in (10, 25, 50, 100):
+            self._count(400)
+            return web.json_response({"errors": [{"code": 1, "message": "Invalid limit"}]}, status=400)
+        posts = self._group(request.match_info["group_id"])
+        ordered = posts[::-1] if request.query.get("sortOrder", "Asc") == "Desc" else posts
+        try:
+            start = int(request.query.get("cursor") or 0)
+        except ValueError:
+            start = 0
+        page = ordered[start:start + limit]
+        end = start + len(page)
+        self._count(200)
+        return web.json_response({
+            "previousPageCursor": str(max(0, start - limit)) if start else None,
+            "nextPageCursor": str(end) if end < len(ordered) else None,
+            "data": page,
+        })
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/v2/groups/{group_id}/wall/posts", self.handle_posts)
+        return app
+
+
+async def start_standin(wall, host="127.0.0.1", port=0):
+    """Start the stand-in on a background site; returns (runner, base_url)."""
+    runner = web.AppRunner(wall.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound = runner.addresses[0][1]
+    return runner, f"http://{host}:{bound}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Roblox group-wall stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--posts", type=int, default=300, help="initial posts per group")
+    parser.add_argument("--link-ratio", type=float, default=0.3)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=2)
+    parser.add_argument("--new-posts-per-min", type=float, default=0.0)
+    args = parser.parse_args()
+
+    wall = StandinWall(args.posts, args.link_ratio, args.latency_ms, args.jitter_ms,
+                       args.rate_429, args.rate_5xx, args.retry_after)
+
+    async def grow():
+        while True:
+            await asyncio.sleep(60 / args.new_posts_per_min)
+            for group_id in list(wall.groups):
+                wall.add_posts(group_id, 1)
+
+    async def on_startup(app):
+        if args.new_posts_per_min > 0:
+            app["grow"] = asyncio.create_task(grow())
+
+    app = wall.app()
+    app.on_startup.append(on_startup)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+# db.py - SQLite connections for main.py
+#
+# The database runs in WAL mode, so readers never wait on a commit:
+#   - one writer connection, serialized by _write_lock; every INSERT/UPDATE/
+#     DELETE and every transaction() goes through it
+#   - a small pool of query_only reader connections for lookups and listings
+#
+# db_exec() keeps its old signature and picks the connection itself: a plain
+# fetch (no commit) is a read, anything else is a write.
+#
+# Code on the Discord event loop uses the awaitable API at the bottom instead,
+# so a slow commit never stalls heartbeats: writes run on one dedicated thread
+# fed by a queue, reads on DB_READERS threads.
+#
+# Every statement is timed and filed under its normalized SQL, separately from
+# the time spent waiting for the writer lock or a pooled reader; db_stats()
+# returns both and anything over DB_SLOW_MS is logged.
+import os
+import re
+import time
+import queue
+import bisect
+import asyncio
+import sqlite3
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DB_FILE = os.getenv("SQLITE_DB", "data.db")
+DB_READERS = int(os.getenv("DB_READERS", "4"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 << 20)))
+DB_CACHE_KB = int(os.getenv("DB_CACHE_KB", "16384"))  # per connection
+DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT", "30"))
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+DB_SLOW_MS = float(os.getenv("DB_SLOW_MS", "100"))  # log statements and lock waits at least this long
+
+
+def _connect(readonly=False):
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False, timeout=DB_BUSY_TIMEOUT)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    if readonly:
+        conn.execute("PRAGMA query_only=1")
+    else:
+        conn.execute("PRAGMA journal_mode=WAL")
+        # in WAL mode NORMAL only syncs at checkpoints; a crash can lose the
+        # last commits but never corrupts the database
+        conn.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+    return conn
+
+
+# ---- instrumentation ----
+_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+_BUCKETS_S = tuple(ms / 1000 for ms in _BUCKETS_MS)
+_SLOW_S = DB_SLOW_MS / 1000
+_bisect = bisect.bisect_left
+
+
+class LatencyStats:
+    """Count, total, max and a fixed-bucket histogram of durations, plus rows."""
+    __slots__ = ("count", "total", "max", "rows", "slow", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.slow = 0
+        self.buckets = [0] * (len(_BUCKETS_S) + 1)
+
+    def add(self, seconds, rows=None):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if rows:
+            self.rows += rows
+        self.buckets[_bisect(_BUCKETS_S, seconds)] += 1
+
+    def percentile(self, pct):
+        """Upper bound (ms) of the bucket holding the pct-th duration."""
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for bound, n in zip(_BUCKETS_MS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max * 1000
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total * 1000 / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max * 1000,
+            "rows": self.rows,
+            "slow": self.slow,
+            "histogram": dict(zip([*_BUCKETS_MS, "inf"], self.buckets)),
+        }
+
+
+_stats_lock = threading.Lock()
+_statements = {}  # normalized SQL -> LatencyStats
+_by_query = {}  # raw SQL -> its entry in _statements, so the hot path skips normalizing
+# only contended acquisitions are timed; an uncontended one costs nothing extra
+_lock_waits = {"writer": LatencyStats(), "readers": LatencyStats()}
+
+_SQL_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST = re.compile(r"\bIN \( ?\?(?: ?, ?\?)* ?\)", re.IGNORECASE)
+_SQL_SPACE = re.compile(r"\s+")
+
+
+def normalize_sql(query):
+    """One key per statement shape: whitespace collapsed, literals and IN-lists folded to ?."""
+    key = _SQL_SPACE.sub(" ", query).strip()
+    key = _SQL_LITERAL.sub("?", key)
+    return _SQL_IN_LIST.sub("IN (?, ...)", key)
+
+
+def _stats_for(query):
+    key = normalize_sql(query)
+    with _stats_lock:
+        stats = _statements.get(key)
+        if stats is None:
+            stats = _statements[key] = LatencyStats()
+        if len(_by_query) < 4096:  # queries are nearly all constants; don't grow without bound
+            _by_query[query] = stats
+    return stats
+
+
+def _record(query, seconds, rows=None):
+    # LatencyStats.add inlined: this runs for every statement
+    stats = _by_query.get(query) or _stats_for(query)
+    with _stats_lock:
+        stats.count += 1
+        stats.total += seconds
+        if seconds > stats.max:
+            stats.max = seconds
+        if rows:
+            stats.rows += rows
+        stats.buckets[_bisect(_BUCKETS_S, seconds)] += 1
+        if seconds >= _SLOW_S:
+            stats.slow += 1
+    if seconds >= _SLOW_S:
+        print(f"[DB] slow query {seconds * 1000:.1f} ms ({rows if rows is not None else '?'} rows): {normalize_sql(query)}")
+
+
+def _record_wait(kind, seconds):
+    with _stats_lock:
+        _lock_waits[kind].add(seconds)
+        if seconds >= _SLOW_S:
+            _lock_waits[kind].slow += 1
+    if seconds >= _SLOW_S:
+        print(f"[DB] waited {seconds * 1000:.1f} ms for {'the writer lock' if kind == 'writer' else 'a reader'}")
+
+
+@contextmanager
+def _locked_writer():
+    if not _write_lock.acquire(blocking=False):
+        start = time.perf_counter()
+        _write_lock.acquire()
+        _record_wait("writer", time.perf_counter() - start)
+    try:
+        yield _writer
+    finally:
+        _write_lock.release()
+
+
+class _TimedCursor:
+    """Writer cursor handed out by transaction(); times each execute/executemany."""
+    __slots__ = ("_cur",)
+
+    def __init__(self, cur):
+        self._cur = cur
+
+    def execute(self, query, params=()):
+        start = time.perf_counter()
+        self._cur.execute(query, params)
+        _record(query, time.perf_counter() - start, self._cur.rowcount if self._cur.rowcount >= 0 else None)
+        return self
+
+    def executemany(self, query, seq):
+        start = time.perf_counter()
+        self._cur.executemany(query, seq)
+        _record(query, time.perf_counter() - start, self._cur.rowcount if self._cur.rowcount >= 0 else None)
+        return self
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+def _commit():
+    start = time.perf_counter()
+    _writer.commit()
+    _record("COMMIT", time.perf_counter() - start)
+
+
+def db_stats():
+    """Snapshot of per-statement latency and lock waits, as plain dicts."""
+    with _stats_lock:
+        return {
+            "slow_ms": DB_SLOW_MS,
+            "statements": {sql: s.as_dict() for sql, s in _statements.items()},
+            "lock_wait": {kind: s.as_dict() for kind, s in _lock_waits.items()},
+        }
+
+
+def reset_db_stats():
+    with _stats_lock:
+        _statements.clear()
+        _by_query.clear()
+        for kind in _lock_waits:
+            _lock_waits[kind] = LatencyStats()
+
+
+# ---- connections ----
+# the writer comes first so the file exists and is in WAL mode before any reader opens it
+_writer = _connect()
+_write_lock = threading.Lock()
+_readers = queue.LifoQueue()
+for _ in range(max(1, DB_READERS)):
+    _readers.put(_connect(readonly=True))
+
+
+@contextmanager
+def reader():
+    try:
+        conn = _readers.get_nowait()
+    except queue.Empty:
+        start = time.perf_counter()
+        conn = _readers.get()
+        _record_wait("readers", time.perf_counter() - start)
+    try:
+        yield conn
+    finally:
+        _readers.put(conn)
+
+
+@contextmanager
+def transaction():
+    """Writer cursor for several statements; committed together, rolled back on error."""
+    with _locked_writer() as conn:
+        cur = _TimedCursor(conn.cursor())
+        try:
+            yield cur
+        except BaseException:
+            conn.rollback()
+            raise
+        _commit()
+
+
+def db_read(query, params=(), fetchone=False):
+    with reader() as conn:
+        start = time.perf_counter()
+        cur = conn.execute(query, params)
+        if fetchone:
+            result = cur.fetchone()
+            rows = 0 if result is None else 1
+        else:
+            result = cur.fetchall()
+            rows = len(result)
+        _record(query, time.perf_counter() - start, rows)
+        return result
+
+
+def db_read_records(cls, query, params=(), fetchone=False):
+    """Like db_read, but maps plain tuple rows positionally onto cls (see records.py)."""
+    with reader() as conn:
+        start = time.perf_counter()
+        cur = conn.cursor()
+        cur.row_factory = None
+        cur.execute(query, params)
+        if fetchone:
+            row = cur.fetchone()
+            _record(query, time.perf_counter() - start, 0 if row is None else 1)
+            return cls(*row) if row is not None else None
+        rows = cur.fetchall()
+        _record(query, time.perf_counter() - start, len(rows))
+        return [cls(*row) for row in rows]
+
+
+def db_exec(query, params=(), fetchone=False, fetchall=False, commit=False):
+    if (fetchone or fetchall) and not commit:
+        return db_read(query, params, fetchone=fetchone)
+    with _locked_writer() as conn:
+        start = time.perf_counter()
+        cur = conn.cursor()
+        cur.execute(query, params)
+        result = None
+        if fetchone:
+            result = cur.fetchone()
+        elif fetchall:
+            result = cur.fetchall()
+        _record(query, time.perf_counter() - start, cur.rowcount if cur.rowcount >= 0 else None)
+        if commit:
+            _commit()
+        return result
+
+
+# ---- async API ----
+# Single-statement writes (db_execute) are group-committed: the writer thread
+# takes everything queued within DB_GROUP_COMMIT_WINDOW of the first write (up
+# to DB_GROUP_COMMIT_MAX) and runs it as one transaction, each statement in its
+# own savepoint so one failure doesn't sink the rest. Callers are only resumed
+# after the commit. db_call() jobs manage their own transactions and run alone.
+DB_GROUP_COMMIT_WINDOW = float(os.getenv("DB_GROUP_COMMIT_WINDOW", "0.002"))
+DB_GROUP_COMMIT_MAX = int(os.getenv("DB_GROUP_COMMIT_MAX", "256"))
+
+_write_queue = queue.Queue()
+_read_executor = ThreadPoolExecutor(max(1, DB_READERS), thread_name_prefix="db-read")
+_group_stats = {"groups": 0, "statements": 0, "largest": 0}
+
+
+def _run_group(jobs):
+    results = []
+    with _locked_writer() as conn:
+        cur = conn.cursor()
+        try:
+            if not conn.in_transaction:
+                cur.execute("BEGIN")  # else releasing the first savepoint would commit
+            for query, params in jobs:
+                cur.execute("SAVEPOINT grp")
+                try:
+                    start = time.perf_counter()
+                    cur.execute(query, params)
+                    _record(query, time.perf_counter() - start, cur.rowcount)
+                    results.append((True, cur.rowcount))
+                    cur.execute("RELEASE grp")
+                except sqlite3.Error as e:
+                    cur.execute("ROLLBACK TO grp")
+                    cur.execute("RELEASE grp")
+                    results.append((False, e))
+            _commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    _group_stats["groups"] += 1
+    _group_stats["statements"] += len(jobs)
+    _group_stats["largest"] = max(_group_stats["largest"], len(jobs))
+    return results
+
+
+def _flush_group(group):
+    if not group:
+        return
+    try:
+        results = _run_group([payload for _, payload, _ in group])
+    except BaseException as e:
+        for _, _, fut in group:
+            fut.set_exception(e)
+        return
+    for (_, _, fut), (ok, value) in zip(group, results):
+        if ok:
+            fut.set_result(value)
+        else:
+            fut.set_exception(value)
+
+
+def _writer_thread():
+    pending = None
+    while True:
+        job = pending or _write_queue.get()
+        pending = None
+        kind, payload, fut = job
+        if kind == "call":
+            if fut.set_running_or_notify_cancel():
+                fn, args = payload
+                try:
+                    fut.set_result(fn(*args))
+                except BaseException as e:
+                    fut.set_exception(e)
+            continue
+
+        group = [job] if fut.set_running_or_notify_cancel() else []
+        deadline = time.monotonic() + DB_GROUP_COMMIT_WINDOW
+        while len(group) < DB_GROUP_COMMIT_MAX:
+            try:
+                nxt = _write_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if nxt[0] != "sql":
+                pending = nxt  # runs right after this group commits
+                break
+            if nxt[2].set_running_or_notify_cancel():
+                group.append(nxt)
+        _flush_group(group)
+
+
+threading.Thread(target=_writer_thread, name="db-writer", daemon=True).start()
+
+
+def submit_write(fn, *args):
+    """Queue fn(*args) for the writer thread; returns a concurrent.futures.Future."""
+    fut = Future()
+    _write_queue.put(("call", (fn, args), fut))
+    return fut
+
+
+def group_commit_stats():
+    return dict(_group_stats)
+
+
+async def db_call(fn, *args):
+    """Await a sync DB function run on the writer thread (it may read too)."""
+    return await asyncio.wrap_future(submit_write(fn, *args))
+
+
+async def db_call_read(fn, *args):
+    """Await a read-only sync DB function run on a reader thread."""
+    return await asyncio.wrap_future(_read_executor.submit(fn, *args))
+
+
+async def db_fetchone(query, params=()):
+    return await db_call_read(db_read, query, params, True)
+
+
+async def db_fetchall(query, params=()):
+    return await db_call_read(db_read, query, params)
+
+
+async def db_fetch_record(cls, query, params=()):
+    return await db_call_read(db_read_records, cls, query, params, True)
+
+
+async def db_fetch_records(cls, query, params=()):
+    return await db_call_read(db_read_records, cls, query, params)
+
+
+async def db_execute(query, params=()):
+    """Run one write; resolves (with its rowcount) once the group it joined is committed."""
+    fut = Future()
+    _write_queue.put(("sql", (query, tuple(params)), fut))
+    return await asyncio.wrap_future(fut)
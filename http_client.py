@@ -0,0 +1,107 @@
+# http_client.py - process-wide pooled aiohttp session
+#
+# Every outbound HTTP call (Roblox wall, Discord invite lookups) goes through
+# one long-lived ClientSession so DNS, TCP and TLS setup is paid once and
+# keep-alive connections are reused.
+import os
+import aiohttp
+
+# ---- Config ----
+HTTP_LIMIT = int(os.getenv("HTTP_LIMIT", "100"))
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", "8"))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "30"))
+HTTP_TIMEOUT = aiohttp.ClientTimeout(
+    total=float(os.getenv("HTTP_TIMEOUT_TOTAL", "15")),
+    connect=float(os.getenv("HTTP_TIMEOUT_CONNECT", "5")),
+    sock_read=float(os.getenv("HTTP_TIMEOUT_READ", "10")),
+)
+
+_session = None
+_stats = {
+    "requests": 0,
+    "errors": 0,
+    "connections_created": 0,
+    "connections_reused": 0,
+    "dns_cache_hits": 0,
+    "dns_cache_misses": 0,
+}
+
+
+# ---- Trace hooks (connection reuse counters) ----
+def _counter(key):
+    async def hook(session, ctx, params):
+        _stats[key] += 1
+    return hook
+
+
+def _trace_config():
+    tc = aiohttp.TraceConfig()
+    tc.on_request_end.append(_counter("requests"))
+    tc.on_request_exception.append(_counter("errors"))
+    tc.on_connection_create_end.append(_counter("connections_created"))
+    tc.on_connection_reuseconn.append(_counter("connections_reused"))
+    tc.on_dns_cache_hit.append(_counter("dns_cache_hits"))
+    tc.on_dns_cache_miss.append(_counter("dns_cache_misses"))
+    return tc
+
+
+# ---- Session lifecycle ----
+def _new_session():
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_LIMIT,
+        limit_per_host=HTTP_LIMIT_PER_HOST,
+        ttl_dns_cache=HTTP_DNS_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=HTTP_TIMEOUT,
+        trace_configs=[_trace_config()],
+    )
+
+
+async def open_http_session():
+    """Create the shared session if needed. Call from on_ready."""
+    return get_http_session()
+
+
+def get_http_session():
+    """Return the shared session, opening it lazily if on_ready hasn't run yet."""
+    global _session
+    if _session is None or _session.closed:
+        _session = _new_session()
+    return _session
+
+
+async def close_http_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def http_stats():
+    stats = dict(_stats)
+    total = stats["connections_created"] + stats["connections_reused"]
+    stats["reuse_ratio"] = stats["connections_reused"] / total if total else 0.0
+    return stats
+
+
+def run_client(client, token):
+    """Like client.run(), but closes the shared HTTP session on shutdown."""
+    import asyncio
+    import discord
+
+    async def runner():
+        try:
+            async with client:
+                await client.start(token)
+        finally:
+            await close_http_session()
+
+    discord.utils.setup_logging()
+    try:
+        asyncio.run(runner())
+    except KeyboardInterrupt:
+        pass
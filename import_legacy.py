@@ -0,0 +1,335 @@
+# import_legacy.py - load the JSON bots' state files into main.py's SQLite database
+#
+# Usage:  SQLITE_DB=data.db python import_legacy.py [--dir .] [--batch 100000]
+#
+# Stop main.py first. It screens seen links through in-memory Bloom filters
+# that are only filled from the database at startup, so links imported under
+# a running bot would look new to it until its next restart.
+#
+# mirror.py, Personal_Client.py, ban.py and Lal.py keep their state in JSON;
+# main.py keeps the same state in SQLite. This reads each file element by
+# element (a top-level list or object is never parsed whole), normalizes the
+# shapes those bots have written over time and inserts in executemany batches,
+# one transaction per batch.
+#
+# Re-running is safe: rows already in the database win (INSERT OR IGNORE).
+# removed_guilds is a log with no key, so identical rows are matched up by
+# count: an entry the file has three times and the table twice adds one row.
+import os
+import sys
+import re
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from link_extract import canonical_link
+
+READ_CHUNK = 1 << 20
+NO_REASON = "No reason recorded"  # what the JSON bots show for a bare id
+STAGING = "import_removed_guilds"  # temp table, on the writer connection only
+
+_scan = json.JSONDecoder().scan_once  # the C scanner behind raw_decode, minus its wrapper
+_WS_COLON = re.compile(r"[ \t\r\n:]*")
+_WS_COMMA = re.compile(r"[ \t\r\n,]*")
+_DELIMS = frozenset(" \t\r\n,:]}")
+_NO_KEY = object()
+
+
+# ---- streaming JSON ----
+def _iter_container(path, opener):
+    """Yield the elements of a top-level JSON list, or the (key, value) pairs of an object."""
+    if not os.path.exists(path):
+        return
+    closer = "]" if opener == "[" else "}"
+    is_list = opener == "["
+    with open(path, "r", encoding="utf-8") as f:
+        buf = f.read(READ_CHUNK).lstrip()
+        if not buf:
+            return  # empty file
+        if buf[0] != opener:
+            raise ValueError(f"{path}: expected a top-level {'list' if is_list else 'object'}")
+        pos = 1
+        eof = False
+        sep = _WS_COMMA
+        key = _NO_KEY
+        while True:
+            pos = sep.match(buf, pos).end()
+            if pos < len(buf):
+                if key is _NO_KEY and buf[pos] == closer:
+                    return
+                try:
+                    value, end = _scan(buf, pos)
+                except (StopIteration, ValueError):
+                    if eof:
+                        raise ValueError(f"{path}: invalid JSON at {buf[pos:pos + 40]!r}")
+                    end = len(buf)
+                # a value cut off at the end of the buffer can still parse (a
+                # number), so only trust one that a delimiter follows
+                if eof or (end < len(buf) and buf[end] in _DELIMS):
+                    pos = end
+                    if is_list:
+                        yield value
+                    elif key is _NO_KEY:
+                        key, sep = value, _WS_COLON
+                    else:
+                        yield key, value
+                        key, sep = _NO_KEY, _WS_COMMA
+                    continue
+            elif eof:
+                raise ValueError(f"{path}: truncated")
+            chunk = f.read(READ_CHUNK)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+
+
+def iter_json_list(path):
+    return _iter_container(path, "[")
+
+
+def iter_json_object(path):
+    return _iter_container(path, "{")
+
+
+# ---- normalizing ----
+def to_int(val):
+    try:
+        return int(val)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_ts(val):
+    # the JSON bots wrote time.time() floats, some entries ints or nothing
+    try:
+        return int(float(val))
+    except (TypeError, ValueError):
+        return None
+
+
+def banned_user_row(entry):
+    if not isinstance(entry, dict):
+        uid = to_int(entry)
+        return (uid, NO_REASON, None, 0, 0) if uid is not None else None
+    uid = to_int(entry.get("id"))
+    if uid is None:
+        return None
+    return (uid, entry.get("reason") or NO_REASON, to_ts(entry.get("timestamp")),
+            int(bool(entry.get("no_appeal"))), int(bool(entry.get("gban"))))
+
+
+def banned_guild_row(entry):
+    if not isinstance(entry, dict):
+        gid = to_int(entry)
+        return (gid, None, NO_REASON, None, 0) if gid is not None else None
+    gid = to_int(entry.get("id"))
+    if gid is None:
+        return None
+    return (gid, entry.get("name"), entry.get("reason") or NO_REASON, to_ts(entry.get("timestamp")),
+            int(bool(entry.get("no_appeal"))))
+
+
+def tempban_row(entry, now):
+    if not isinstance(entry, dict):
+        return None
+    uid, expires = to_int(entry.get("id")), to_ts(entry.get("expires"))
+    if uid is None or expires is None or expires <= now:
+        return None  # unusable, or already expired
+    return (uid, expires, entry.get("reason") or NO_REASON,
+            int(bool(entry.get("no_appeal"))), int(bool(entry.get("gban"))))
+
+
+def removed_guild_row(entry):
+    if not isinstance(entry, dict):
+        gid = to_int(entry)
+        return (gid, None, None) if gid is not None else None
+    gid = to_int(entry.get("id"))
+    return (gid, entry.get("name"), to_ts(entry.get("timestamp"))) if gid is not None else None
+
+
+def invite_row(code, data):
+    if not isinstance(data, dict):
+        return None
+    guild = data.get("guild") or {}
+    return (str(code), to_int(guild.get("id")), json.dumps(data, ensure_ascii=False))
+
+
+# ---- importers ----
+class Importer:
+    def __init__(self, base, batch):
+        self.base = base
+        self.batch = batch
+        self.now = int(time.time())
+
+    def path(self, name):
+        return os.path.join(self.base, name)
+
+    def load(self, label, rows, sql, merge=None):
+        """Insert rows in batches; a None row is counted as skipped.
+
+        With `merge`, sql fills a temp staging table and, after the last
+        batch, merge moves the new rows across in one statement.
+        """
+        from db import transaction
+        start = time.perf_counter()
+        read = inserted = skipped = 0
+        pending = []
+
+        def write(batch):
+            with transaction() as cur:
+                before = cur.connection.total_changes
+                cur.executemany(sql, batch)
+                return cur.connection.total_changes - before
+
+        # one batch commits on the writer thread while the next is parsed
+        in_flight = None
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            for row in rows:
+                read += 1
+                if row is None:
+                    skipped += 1
+                    continue
+                pending.append(row)
+                if len(pending) >= self.batch:
+                    if in_flight:
+                        inserted += in_flight.result()
+                    in_flight = writer.submit(write, pending)
+                    pending = []
+            if in_flight:
+                inserted += in_flight.result()
+            if pending:
+                inserted += write(pending)
+        if merge:
+            # a key's duplicates can straddle batches, so staged rows are only
+            # compared with the table once the whole file is in
+            with transaction() as cur:
+                before = cur.connection.total_changes
+                cur.execute(merge)
+                inserted = cur.connection.total_changes - before
+                cur.execute(f"DELETE FROM {STAGING}")
+        took = time.perf_counter() - start
+        print(f"[IMPORT] {label}: {read:,} read, {inserted:,} new, {read - inserted - skipped:,} already present, "
+              f"{skipped:,} skipped ({took:.2f}s)")
+
+    def banned_users(self):
+        self.load("banned_users.json", map(banned_user_row, iter_json_list(self.path("banned_users.json"))),
+                  "INSERT OR IGNORE INTO banned_users (id, reason, timestamp, no_appeal, gban) VALUES (?, ?, ?, ?, ?)")
+
+    def banned_guilds(self):
+        self.load("banned_guilds.json", map(banned_guild_row, iter_json_list(self.path("banned_guilds.json"))),
+                  "INSERT OR IGNORE INTO banned_guilds (id, name, reason, timestamp, no_appeal) VALUES (?, ?, ?, ?, ?)")
+
+    def tempbans(self):
+        self.load("tempbans.json", (tempban_row(e, self.now) for e in iter_json_list(self.path("tempbans.json"))),
+                  "INSERT OR IGNORE INTO temp_bans (id, expires, reason, no_appeal, gban) VALUES (?, ?, ?, ?, ?)")
+
+    def removed_guilds(self):
+        # a log with no key: numbering each identical row on both sides makes
+        # EXCEPT keep the file's copies beyond those the table already has
+        from db import transaction
+        with transaction() as cur:
+            cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {STAGING} (id INTEGER, name TEXT, timestamp INTEGER)")
+            cur.execute(f"DELETE FROM {STAGING}")
+        self.load("removed_guilds.json", map(removed_guild_row, iter_json_list(self.path("removed_guilds.json"))),
+                  f"INSERT INTO {STAGING} (id, name, timestamp) VALUES (?, ?, ?)",
+                  merge=f"""
+                      INSERT INTO removed_guilds (id, name, timestamp)
+                      SELECT id, name, timestamp FROM (
+                          SELECT id, name, timestamp, ROW_NUMBER() OVER (PARTITION BY id, name, timestamp)
+                          FROM {STAGING}
+                          EXCEPT
+                          SELECT id, name, timestamp, ROW_NUMBER() OVER (PARTITION BY id, name, timestamp)
+                          FROM main.removed_guilds
+                      )
+                  """)
+
+    def invite_cache(self):
+        self.load("invite_cache.json", (invite_row(c, d) for c, d in iter_json_object(self.path("invite_cache.json"))),
+                  "INSERT OR IGNORE INTO invite_cache (code, guild_id, data) VALUES (?, ?, ?)")
+
+    def blacklist(self):
+        # {"blacklisted": [user ids], "seed": [...]}; Lal.py never reads "seed" and it holds no ids
+        ids = ()
+        for key, value in iter_json_object(self.path(os.path.join("data", "blacklist.json"))):
+            if key == "blacklisted" and isinstance(value, list):
+                ids = value
+        self.load("data/blacklist.json", ((uid,) if uid is not None else None for uid in map(to_int, ids)),
+                  "INSERT OR IGNORE INTO blacklisted_users (id) VALUES (?)")
+
+    def seen_links(self):
+        self.load("seen_links.json", self.seen_link_rows(),
+                  "INSERT OR IGNORE INTO seen_links (guild_id, link_id, first_seen) "
+                  "SELECT ?, id, ? FROM links WHERE url=?")
+
+    def seen_link_rows(self):
+        """(guild_id, first_seen, key) for mirror.py's file and journal, oldest first per guild."""
+        from db import transaction
+        path = self.path("seen_links.json")
+        journals = [self.path("seen_links.journal.old"), self.path("seen_links.journal")]
+        guilds = {}
+        links = []
+        for gid, stored in iter_json_object(path):
+            if gid == "links" and isinstance(stored, list):
+                # {"links": [key, ...], "guilds": {gid: "space-separated indexes into links"}}
+                links = stored
+            elif gid == "guilds" and isinstance(stored, dict):
+                for g, ids in stored.items():
+                    guilds[g] = [links[int(i)] for i in ids.split()]
+            else:
+                # older files: {gid: newline-joined links or a list of links}
+                if isinstance(stored, str):
+                    stored = stored.split("\n") if stored else []
+                guilds[gid] = [canonical_link(l) for l in stored if isinstance(l, str) and l]
+        for journal in journals:
+            if not os.path.exists(journal):
+                continue
+            with open(journal, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line
+                    guilds.setdefault(str(entry.get("g")), []).extend(entry.get("l") or ())
+
+        # mirror.py keeps no timestamps; count back from the newest write so
+        # trims still drop each guild's oldest links first
+        newest = max([int(os.path.getmtime(p)) for p in [path] + journals if os.path.exists(p)] or [self.now])
+        keys = {key for seen in guilds.values() for key in seen}
+        with transaction() as cur:
+            cur.executemany("INSERT OR IGNORE INTO links (url, first_seen) VALUES (?, ?)",
+                            ((key, newest) for key in keys))
+        for gid, seen in guilds.items():
+            gid = to_int(gid) or 0  # mirror.py files "None" for guild-less calls
+            for i, key in enumerate(seen):
+                yield gid, newest - (len(seen) - 1 - i), key
+
+
+IMPORTS = ["banned_users", "banned_guilds", "tempbans", "removed_guilds", "seen_links", "invite_cache", "blacklist"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import the JSON bots' state into the SQLite database")
+    parser.add_argument("--dir", default=".", help="directory holding the JSON files (default: .)")
+    parser.add_argument("--batch", type=int, default=100000, help="rows per executemany transaction")
+    parser.add_argument("--only", choices=IMPORTS, action="append", help="import just these (repeatable)")
+    args = parser.parse_args()
+
+    from db import DB_FILE
+    from migrations import run_migrations
+    run_migrations()
+    print(f"[IMPORT] {os.path.abspath(args.dir)} -> {DB_FILE}")
+    importer = Importer(args.dir, max(1, args.batch))
+    failed = 0
+    for name in args.only or IMPORTS:
+        try:
+            getattr(importer, name)()
+        except Exception as e:
+            failed += 1
+            print(f"[ERROR] importing {name}: {e}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# link_extract.py - the one link-extraction engine every bot entry point uses
+#
+# Two modes:
+#   strict - only https://www.roblox.com/share links (what /links shows)
+#   loose  - any http(s) token that points somewhere on roblox.com
+#
+# Bodies that don't contain the mode's marker substring are skipped without
+# running a regex at all, which is most wall posts.
+#
+# canonical_link() reduces a link to the compact key used for dedupe and
+# storage; users are still shown the original URL.
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+STRICT = "strict"
+LOOSE = "loose"
+
+_STRICT_MARKER = "roblox.com/share"
+_STRICT_RE = re.compile(r"https?://www\.roblox\.com/share(?:[/?][A-Za-z0-9_\-=&?#%]+)?")
+
+# The old loose pattern, https?://[^\s]+roblox\.com/[^\s]*, backtracks across
+# the whole token for every "http" it tries. It always matches from the first
+# http(s):// in a whitespace-delimited token to the end of that token, as long
+# as "roblox.com/" follows at least one character after the "://". So match the
+# token once and do the roblox.com/ check with str.find instead.
+_LOOSE_MARKER = "roblox.com/"
+_LOOSE_RE = re.compile(r"https?://(\S+)")
+
+
+def find_links(body, mode=STRICT):
+    """Return every link in body, in order (duplicates included)."""
+    if not body:
+        return []
+    if mode == STRICT:
+        if _STRICT_MARKER not in body:
+            return []
+        return _STRICT_RE.findall(body)
+    if _LOOSE_MARKER not in body:
+        return []
+    return [m.group(0) for m in _LOOSE_RE.finditer(body) if m.group(1).find(_LOOSE_MARKER, 1) != -1]
+
+
+def unique_links(bodies, mode=STRICT):
+    """Links across several bodies, one per canonical key, first occurrence wins."""
+    seen = set()
+    unique = []
+    for body in bodies:
+        for link in find_links(body, mode):
+            key = canonical_link(link)
+            if key not in seen:
+                seen.add(key)
+                unique.append(link)
+    return unique
+
+
+# ---- Canonical keys ----
+_TRAILING_PUNCT = ".,;:!?)]}>'\"*_~"
+
+
+@lru_cache(maxsize=4096)
+def canonical_link(link):
+    """
+    Dedupe key for a link. roblox.com/share?code=X&type=Y becomes
+    "share:X:y"; other URLs lose scheme, www., fragment and trailing
+    punctuation and get a lowercase host and sorted query. Anything that
+    isn't an http(s) URL (e.g. an existing key) is returned unchanged.
+    """
+    url = link.strip().rstrip(_TRAILING_PUNCT)
+    try:
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+    except ValueError:
+        return link
+    if parts.scheme.lower() not in ("http", "https") or not host:
+        return link
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/")
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    if host == "roblox.com" and path.lower() == "/share":
+        query = {k.lower(): v for k, v in params}
+        if query.get("code"):
+            return f"share:{query['code']}:{query.get('type', '').lower()}"
+    query = urlencode(sorted(params))
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
@@ -0,0 +1,44 @@
+# link_ring.py - fixed-capacity, insertion-ordered set of link keys
+#
+# One per guild in mirror.py. Keys live in a preallocated slot list used as a
+# ring plus a set for membership, so adding past capacity evicts the oldest key
+# in O(1) and a guild never holds more than `capacity` keys.
+
+
+class LinkRing:
+    __slots__ = ("capacity", "_slots", "_next", "_size", "_keys")
+
+    def __init__(self, capacity, keys=()):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._next = 0   # slot the next key goes into (the oldest key once full)
+        self._size = 0
+        self._keys = set()
+        for key in keys:
+            self.add(key)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        """Keys oldest first."""
+        start = self._next if self._size == self.capacity else 0
+        slots = self._slots
+        for i in range(self._size):
+            yield slots[(start + i) % self.capacity]
+
+    def add(self, key):
+        """Add key as the newest entry; returns False if it was already present."""
+        if key in self._keys:
+            return False
+        if self._size == self.capacity:
+            self._keys.discard(self._slots[self._next])
+        else:
+            self._size += 1
+        self._slots[self._next] = key
+        self._keys.add(key)
+        self._next = (self._next + 1) % self.capacity
+        return True
@@ -6,12 +6,19 @@ import json
 import io
 import time
 import asyncio
-import sqlite3
 import discord
 from discord import app_commands
 from flask import Flask
-import aiohttp
+from http_client import open_http_session, get_http_session, run_client, http_stats
 from discord.ui import View, Button
+from roblox_wall import get_snapshot, start_wall_poller, add_new_links_listener, revalidate_if_stale, freshness_text, scheduler, breaker, wall_stats
+from link_extract import canonical_link, STRICT
+from seen_filter import SeenLinkFilter
+from migrations import run_migrations
+from db import db_exec, transaction, db_call, db_fetch_record, db_fetch_records, db_execute, db_stats, group_commit_stats
+from records import (BannedUser, TempBan, BannedGuild, RemovedGuild, Subscription, SELECT_BANNED_USER,
+                     SELECT_BANNED_USERS, SELECT_TEMPBAN, SELECT_BANNED_GUILD, SELECT_BANNED_GUILDS,
+                     SELECT_REMOVED_GUILDS, SELECT_SUBSCRIPTIONS)
 
 # ---- Secrets / config ----
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -19,71 +26,11 @@ GROUP_ID = os.getenv("GROUP_ID")
 ROBLOX_COOKIE = os.getenv("ROBLOX_COOKIE")
 OWNER_ID = int(os.getenv("OWNER_ID", "1329161792936476683"))
 
-DB_FILE = os.getenv("SQLITE_DB", "data.db")
-
 # ---- Database setup ----
-_conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-_conn.row_factory = sqlite3.Row
-_db_lock = threading.Lock()
-
-def db_exec(query, params=(), fetchone=False, fetchall=False, commit=False):
-    with _db_lock:
-        cur = _conn.cursor()
-        cur.execute(query, params)
-        result = None
-        if fetchone:
-            result = cur.fetchone()
-        elif fetchall:
-            result = cur.fetchall()
-        if commit:
-            _conn.commit()
-        return result
-
-# Create tables
-with _db_lock:
-    cur = _conn.cursor()
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS banned_guilds (
-        id INTEGER PRIMARY KEY,
-        name TEXT,
-        reason TEXT,
-        timestamp INTEGER,
-        no_appeal INTEGER DEFAULT 0
-    )
-    """)
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS removed_guilds (
-        id INTEGER,
-        name TEXT,
-        timestamp INTEGER
-    )
-    """)
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS banned_users (
-        id INTEGER PRIMARY KEY,
-        reason TEXT,
-        timestamp INTEGER,
-        no_appeal INTEGER DEFAULT 0,
-        gban INTEGER DEFAULT 0
-    )
-    """)
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS temp_bans (
-        id INTEGER PRIMARY KEY,
-        expires INTEGER,
-        reason TEXT,
-        no_appeal INTEGER DEFAULT 0,
-        gban INTEGER DEFAULT 0
-    )
-    """)
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS seen_links (
-        link TEXT PRIMARY KEY,
-        guild_id INTEGER,
-        first_seen INTEGER
-    )
-    """)
-    _conn.commit()
+# connections, WAL and the read pool live in db.py
+
+# schema changes are versioned migrations in migrations.py
+run_migrations()
 
 # ---- Flask keepalive ----
 app = Flask(__name__)
@@ -113,153 +60,249 @@ def to_int(val):
         return None
 
 # --- BANNED USERS ---
-def find_banned_user_entry(uid: int):
-    r = db_exec("SELECT * FROM banned_users WHERE id=? LIMIT 1", (uid,), fetchone=True)
-    if not r:
-        return None
-    return {
-        "id": r["id"],
-        "reason": r["reason"],
-        "timestamp": r["timestamp"],
-        "no_appeal": bool(r["no_appeal"]),
-        "gban": bool(r.get("gban", 0))
-    }
-
-def add_banned_user(uid: int, reason: str, no_appeal: bool = False, gban: bool = False):
+async def find_banned_user_entry(uid: int):
+    return await db_fetch_record(BannedUser, SELECT_BANNED_USER, (uid,))
+
+async def add_banned_user(uid: int, reason: str, no_appeal: bool = False, gban: bool = False):
     ts = int(time.time())
-    db_exec(
+    await db_execute(
         "INSERT OR REPLACE INTO banned_users (id, reason, timestamp, no_appeal, gban) VALUES (?, ?, ?, ?, ?)",
-        (uid, reason, ts, int(no_appeal), int(gban)),
-        commit=True
+        (uid, reason, ts, int(no_appeal), int(gban))
     )
 
-def remove_banned_user(uid: int):
-    db_exec("DELETE FROM banned_users WHERE id=?", (uid,), commit=True)
+async def remove_banned_user(uid: int):
+    await db_execute("DELETE FROM banned_users WHERE id=?", (uid,))
 
 # --- TEMP BANS ---
-def add_tempban(uid: int, expires: float, reason: str, no_appeal: bool = False, gban: bool = False):
-    db_exec(
+async def add_tempban(uid: int, expires: float, reason: str, no_appeal: bool = False, gban: bool = False):
+    await db_execute(
         "INSERT OR REPLACE INTO temp_bans (id, expires, reason, no_appeal, gban) VALUES (?, ?, ?, ?, ?)",
-        (uid, int(expires), reason, int(no_appeal), int(gban)),
-        commit=True
+        (uid, int(expires), reason, int(no_appeal), int(gban))
     )
 
-def remove_tempban(uid: int):
-    db_exec("DELETE FROM temp_bans WHERE id=?", (uid,), commit=True)
+async def remove_tempban(uid: int):
+    await db_execute("DELETE FROM temp_bans WHERE id=?", (uid,))
 
-def get_tempban(uid: int):
-    now = int(time.time())
-    db_exec("DELETE FROM temp_bans WHERE expires <= ?", (now,), commit=True)
-    r = db_exec("SELECT * FROM temp_bans WHERE id=? LIMIT 1", (uid,), fetchone=True)
-    if not r:
-        return None
-    return {
-        "id": r["id"],
-        "expires": r["expires"],
-        "reason": r["reason"],
-        "no_appeal": bool(r["no_appeal"]),
-        "gban": bool(r.get("gban", 0))
-    }
+async def get_tempban(uid: int):
+    # expired rows are ignored here and deleted by periodic_cleanup, so a ban
+    # check is a pure read
+    return await db_fetch_record(TempBan, SELECT_TEMPBAN, (uid, int(time.time())))
 
 # --- BANNED GUILDS ---
-def find_banned_guild_entry(gid: int):
-    r = db_exec("SELECT * FROM banned_guilds WHERE id=? LIMIT 1", (gid,), fetchone=True)
-    if not r:
-        return None
-    return {"id": r["id"], "name": r["name"], "reason": r["reason"], "timestamp": r["timestamp"], "no_appeal": bool(r["no_appeal"])}
+async def find_banned_guild_entry(gid: int):
+    return await db_fetch_record(BannedGuild, SELECT_BANNED_GUILD, (gid,))
 
-def add_banned_guild(gid: int, name: str, reason: str, no_appeal: bool = False):
+async def add_banned_guild(gid: int, name: str, reason: str, no_appeal: bool = False):
     ts = int(time.time())
-    db_exec(
+    await db_execute(
         "INSERT OR REPLACE INTO banned_guilds (id, name, reason, timestamp, no_appeal) VALUES (?, ?, ?, ?, ?)",
-        (gid, name, reason, ts, int(no_appeal)),
-        commit=True
+        (gid, name, reason, ts, int(no_appeal))
     )
 
-def remove_banned_guild(gid: int):
-    db_exec("DELETE FROM banned_guilds WHERE id=?", (gid,), commit=True)
+async def remove_banned_guild(gid: int):
+    await db_execute("DELETE FROM banned_guilds WHERE id=?", (gid,))
 
 # --- REMOVED GUILDS ---
-def add_removed_guild(gid: int, name: str):
-    db_exec(
+async def add_removed_guild(gid: int, name: str):
+    await db_execute(
         "INSERT INTO removed_guilds (id, name, timestamp) VALUES (?, ?, ?)",
-        (gid, name, int(time.time())),
-        commit=True
+        (gid, name, int(time.time()))
     )
 
-def list_removed_guilds():
-    rows = db_exec("SELECT * FROM removed_guilds ORDER BY timestamp DESC", fetchall=True)
-    return rows or []
+async def list_removed_guilds():
+    return await db_fetch_records(RemovedGuild, SELECT_REMOVED_GUILDS)
 
 # --- SEEN LINKS ---
-def seen_link_exists(link: str):
-    r = db_exec("SELECT * FROM seen_links WHERE link=? LIMIT 1", (link,), fetchone=True)
+# rows are keyed by (guild_id, canonical_link()), not the URL as posted
+SEEN_LINKS_CAP = 500  # newest links kept per guild
+
+def seen_link_exists(link: str, gid: int):
+    key = canonical_link(link)
+    if seen_filter.definitely_new(gid or 0, key):
+        return False
+    r = db_exec("""
+        SELECT 1 FROM links l JOIN seen_links s ON s.guild_id=? AND s.link_id=l.id
+        WHERE l.url=? LIMIT 1
+    """, (gid or 0, key), fetchone=True)
+    if r is None:
+        seen_filter.false_positives += 1
     return r is not None
 
+def filter_seen_links(gid: int, keys):
+    """Subset of keys already recorded for this guild; the Bloom filter screens out most new ones."""
+    maybe = [k for k in keys if not seen_filter.definitely_new(gid or 0, k)]
+    seen = set()
+    for i in range(0, len(maybe), 500):
+        chunk = maybe[i:i + 500]
+        rows = db_exec(f"""
+            SELECT l.url FROM links l JOIN seen_links s ON s.guild_id=? AND s.link_id=l.id
+            WHERE l.url IN ({','.join('?' * len(chunk))})
+        """, (gid or 0, *chunk), fetchall=True)
+        seen.update(r["url"] for r in (rows or []))
+    seen_filter.false_positives += len(maybe) - len(seen)
+    return seen
+
+def _insert_seen_links(cur, gid: int, keys, now: int):
+    cur.executemany("INSERT OR IGNORE INTO links (url, first_seen) VALUES (?, ?)", [(k, now) for k in keys])
+    cur.executemany("""
+        INSERT OR REPLACE INTO seen_links (guild_id, link_id, first_seen)
+        SELECT ?, id, ? FROM links WHERE url=?
+    """, [(gid, now, k) for k in keys])
+
 def add_seen_link(link: str, gid: int):
-    db_exec("INSERT OR REPLACE INTO seen_links (link, guild_id, first_seen) VALUES (?, ?, ?)",
-            (link, gid or 0, int(time.time())), commit=True)
+    key = canonical_link(link)
+    with transaction() as cur:
+        _insert_seen_links(cur, gid or 0, [key], int(time.time()))
+    seen_filter.add(gid or 0, [key])
     enforce_seen_links_cap(gid)
 
+def add_seen_links(gid: int, links):
+    """Record a batch of links for one guild: one transaction, one cap check."""
+    keys = [canonical_link(l) for l in links]
+    if not keys:
+        return
+    with transaction() as cur:
+        _insert_seen_links(cur, gid or 0, keys, int(time.time()))
+        _trim_seen_links(cur, gid or 0, SEEN_LINKS_CAP)
+    seen_filter.add(gid or 0, keys)
+
 def get_seen_links_for_guild(gid: int):
-    rows = db_exec("SELECT link FROM seen_links WHERE guild_id=? ORDER BY first_seen DESC", (gid,), fetchall=True)
-    return [r["link"] for r in (rows or [])]
+    rows = db_exec("""
+        SELECT l.url FROM seen_links s JOIN links l ON l.id = s.link_id
+        WHERE s.guild_id=? ORDER BY s.first_seen DESC
+    """, (gid,), fetchall=True)
+    return [r["url"] for r in (rows or [])]
 
 def count_seen_links_for_guild(gid: int):
     r = db_exec("SELECT COUNT(*) as c FROM seen_links WHERE guild_id=?", (gid,), fetchone=True)
     return r["c"] if r else 0
 
-def enforce_seen_links_cap(gid: int, cap=500):
-    r = db_exec("SELECT link FROM seen_links WHERE guild_id=? ORDER BY first_seen DESC LIMIT ? OFFSET ?",
-                (gid, cap, cap), fetchall=True)
-    if not r:
-        return
-    links_to_delete = [row["link"] for row in r]
-    with _db_lock:
-        cur = _conn.cursor()
-        cur.executemany("DELETE FROM seen_links WHERE link=?", [(l,) for l in links_to_delete])
-        _conn.commit()
-
-def clean_old_links_global(max_total_per_guild=1000, trim_to=500):
-    with _db_lock:
-        cur = _conn.cursor()
-        cur.execute("SELECT guild_id, COUNT(*) as c FROM seen_links GROUP BY guild_id HAVING c > ?", (max_total_per_guild,))
-        rows = cur.fetchall()
-        for row in rows:
-            gid = row[0]
+def _trim_seen_links(cur, gid: int, keep: int, limit=None):
+    # the newest row that falls outside the keep window, then everything at or
+    # below it in (first_seen, link_id) order: two seeks on the guild's index range
+    cur.execute("""
+        SELECT first_seen, link_id FROM seen_links WHERE guild_id=?
+        ORDER BY first_seen DESC, link_id DESC LIMIT 1 OFFSET ?
+    """, (gid, keep))
+    edge = cur.fetchone()
+    if edge is None:
+        return 0
+    edge = (edge["first_seen"], edge["link_id"])
+    if limit is not None:
+        # stop at the guild's `limit`-th oldest row if that comes first
+        cur.execute("""
+            SELECT first_seen, link_id FROM seen_links WHERE guild_id=?
+            ORDER BY first_seen, link_id LIMIT 1 OFFSET ?
+        """, (gid, limit - 1))
+        lowest = cur.fetchone()
+        if lowest is not None:
+            edge = min(edge, (lowest["first_seen"], lowest["link_id"]))
+    cur.execute("DELETE FROM seen_links WHERE guild_id=? AND (first_seen, link_id) <= (?, ?)", (gid, *edge))
+    return cur.rowcount
+
+def enforce_seen_links_cap(gid: int, cap=SEEN_LINKS_CAP):
+    with transaction() as cur:
+        _trim_seen_links(cur, gid or 0, cap)
+
+SEEN_TRIM_CHUNK = 2000  # rows per retention delete; the writer is released between chunks
+LAST_ROWID = (1 << 63) - 1
+
+def clean_old_links_global(keep=SEEN_LINKS_CAP, chunk=SEEN_TRIM_CHUNK):
+    """
+    Sweep every guild back to its newest `keep` links. Inserts already trim
+    their own guild, so this only catches leftovers (cap changes, old rows).
+    Guilds are walked one at a time with the same index-range delete as the
+    insert path, at most `chunk` rows per transaction, then links no guild
+    references any more are dropped from `links` in id ranges of `chunk`.
+    """
+    total = 0
+    gid = 0
+    while True:
+        with transaction() as cur:
+            cur.execute("SELECT guild_id FROM seen_links WHERE guild_id >= ? ORDER BY guild_id LIMIT 1", (gid,))
+            row = cur.fetchone()
+            if row is None:
+                break
+            gid = row["guild_id"]
+            deleted = _trim_seen_links(cur, gid, keep, chunk)
+        total += deleted
+        if deleted < chunk:
+            gid += 1  # this guild is within `keep` now
+        time.sleep(0)  # let waiting writers in between chunks
+
+    orphans = 0
+    last = 0
+    while True:
+        with transaction() as cur:
+            cur.execute("SELECT id FROM links WHERE id > ? ORDER BY id LIMIT 1 OFFSET ?", (last, chunk - 1))
+            row = cur.fetchone()
+            upto = row["id"] if row else LAST_ROWID
             cur.execute("""
-                DELETE FROM seen_links WHERE link IN (
-                    SELECT link FROM seen_links WHERE guild_id=? ORDER BY first_seen ASC LIMIT ?
-                )
-            """, (gid, row[1] - trim_to))
-        _conn.commit()
+                DELETE FROM links WHERE id > ? AND id <= ?
+                AND NOT EXISTS (SELECT 1 FROM seen_links WHERE link_id = links.id)
+            """, (last, upto))
+            orphans += cur.rowcount
+        if row is None:
+            break
+        last = upto
+        time.sleep(0)
+    if total or orphans:
+        print(f"🧹 trimmed {total} old seen links, {orphans} unreferenced links")
+    return total
+
+seen_filter = SeenLinkFilter(get_seen_links_for_guild)
+
+def warm_seen_filter():
+    rows = db_exec("""
+        SELECT s.guild_id, l.url FROM seen_links s JOIN links l ON l.id = s.link_id ORDER BY s.guild_id
+    """, fetchall=True) or []
+    keys, gid = [], None
+    for r in rows:
+        if r["guild_id"] != gid:
+            if gid is not None:
+                seen_filter.warm(gid, keys)
+            keys, gid = [], r["guild_id"]
+        keys.append(r["url"])
+    if gid is not None:
+        seen_filter.warm(gid, keys)
+
+warm_seen_filter()
+
+# --- LINK SUBSCRIPTIONS ---
+async def set_subscription(gid: int, channel_id: int):
+    await db_execute("INSERT OR REPLACE INTO link_subscriptions (guild_id, channel_id, created) VALUES (?, ?, ?)",
+                     (gid, channel_id, int(time.time())))
+
+async def remove_subscription(gid: int):
+    await db_execute("DELETE FROM link_subscriptions WHERE guild_id=?", (gid,))
+
+async def list_subscriptions():
+    return [(s.guild_id, s.channel_id) for s in await db_fetch_records(Subscription, SELECT_SUBSCRIPTIONS)]
 
 # ---- ban checks ----
-def is_tempbanned(uid: int):
-    entry = get_tempban(uid)
+async def is_tempbanned(uid: int):
+    entry = await get_tempban(uid)
     return entry
 
 async def check_user_ban(interaction: discord.Interaction):
     uid = interaction.user.id
-    entry = find_banned_user_entry(uid)
+    entry = await find_banned_user_entry(uid)
     if entry:
-        reason = entry.get("reason", "No reason provided")
-        ts = entry.get("timestamp")
+        reason = entry.reason or "No reason provided"
+        ts = entry.timestamp
         ts_text = f"\nBanned at: <t:{int(ts)}:F>" if ts else ""
-        no_appeal = entry.get("no_appeal", False)
-        appeal_text = "\nThis ban cannot be appealed." if no_appeal else "\nIf you believe this is a mistake, DM **@h.aze.l**."
+        appeal_text = "\nThis ban cannot be appealed." if entry.no_appeal else "\nIf you believe this is a mistake, DM **@h.aze.l**."
         await interaction.response.send_message(
             f"🚫 You are banned from using this bot.\n**Reason:** {reason}{ts_text}{appeal_text}",
             ephemeral=True
         )
         return True
 
-    tentry = is_tempbanned(uid)
+    tentry = await is_tempbanned(uid)
     if tentry:
-        reason = tentry.get("reason", "No reason provided")
-        expires = int(tentry.get("expires", time.time()))
-        no_appeal = tentry.get("no_appeal", False)
-        appeal_text = "\nThis ban cannot be appealed." if no_appeal else ""
+        reason = tentry.reason or "No reason provided"
+        expires = int(tentry.expires)
+        appeal_text = "\nThis ban cannot be appealed." if tentry.no_appeal else ""
         await interaction.response.send_message(
             f"⏳ You are temporarily banned from this bot.\n**Reason:** {reason}\nBan expires: <t:{expires}:F>{appeal_text}",
             ephemeral=True
@@ -272,14 +315,13 @@ async def check_guild_ban(interaction: discord.Interaction):
     gid = interaction.guild_id
     if gid is None:
         return False
-    entry = find_banned_guild_entry(gid)
+    entry = await find_banned_guild_entry(gid)
     if entry:
-        reason = entry.get("reason", "No reason provided")
-        name = entry.get("name") or (interaction.guild.name if interaction.guild else "Unknown")
-        ts = entry.get("timestamp")
+        reason = entry.reason or "No reason provided"
+        name = entry.name or (interaction.guild.name if interaction.guild else "Unknown")
+        ts = entry.timestamp
         ts_text = f"\nBanned at: <t:{int(ts)}:F>" if ts else ""
-        no_appeal = entry.get("no_appeal", False)
-        appeal_text = "\nThis ban cannot be appealed." if no_appeal else "\n Contact **@h.aze.l** to appeal."
+        appeal_text = "\nThis ban cannot be appealed." if entry.no_appeal else "\n Contact **@h.aze.l** to appeal."
         embed = discord.Embed(
             title="Access Denied ❌",
             description=f"This server is blacklisted from using this bot.\n**Server:** {name}\n**Reason:** {reason}{ts_text}{appeal_text}",
@@ -290,6 +332,225 @@ async def check_guild_ban(interaction: discord.Interaction):
         return True
     return False
 
+# ---- Maintenance flag ----
+MAINTENANCE = False
+def set_maintenance(state: bool):
+    global MAINTENANCE
+    MAINTENANCE = state
+
+# ---- Owner-only check decorator ----
+def owner_only():
+    def predicate(interaction: discord.Interaction):
+        return interaction.user.id == OWNER_ID
+    return app_commands.check(predicate)
+
+# ---- Group wall links ----
+# only accept /share/ links
+LINK_MODE = STRICT
+
+def record_new_links(gid: int, links):
+    """Return the links this guild hasn't been shown yet and record them as seen."""
+    if not links:
+        return []
+    candidates = {}
+    for l in links:
+        candidates.setdefault(canonical_link(l), l)
+    existing = filter_seen_links(gid, list(candidates))
+    new_links = [l for key, l in candidates.items() if key not in existing]
+    add_seen_links(gid, new_links)
+    return new_links
+
+async def take_new_links(gid: int):
+    links = get_snapshot().links
+    revalidate_if_stale()
+    return await db_call(record_new_links, gid, links)
+
+# ---- /links command ----
+@tree.command(name="links", description="Get scammer private server links! (Developed by h.aze.l)")
+async def links_command(interaction: discord.Interaction):
+    if await check_guild_ban(interaction):
+        return
+    if await check_user_ban(interaction):
+        return
+
+    links = await take_new_links(interaction.guild_id)
+    if not links:
+        await interaction.response.send_message("No roblox.com/share links found 😢")
+        return
+
+    pretty = [f"[Click Here ({i})]({l})" for i, l in enumerate(links[:10], start=1)]
+    message = "\n\n".join(pretty)
+    title = "⚠️ Latest SAB Scammer PS Links 🔗"
+    if MAINTENANCE:
+        title = "⚠️ Maintenance Mode 🟠 | Latest SAB Scammer Links 🔗"
+        message = f"⚠️ The bot is currently in maintenance mode and may experience issues.\n\n{message}"
+    embed = discord.Embed(title=title, description=message, color=0x00ffcc if not MAINTENANCE else 0xFFA500)
+    embed.set_image(url="https://pbs.twimg.com/media/GvwdBD4XQAAL-u0.jpg")
+    embed.set_footer(text=f"DM @h.aze.l for bug reports | Made by SAB-RS | Links {freshness_text()}")
+    await interaction.response.send_message(embed=embed)
+
+# ---- /onelink command ----
+@tree.command(name="onelink", description="Get the first scammer private server link with a button")
+async def onelink_command(interaction: discord.Interaction):
+    if await check_guild_ban(interaction):
+        return
+    if await check_user_ban(interaction):
+        return
+
+    links = await take_new_links(interaction.guild_id)
+    if not links:
+        await interaction.response.send_message("No roblox.com/share links found 😢", ephemeral=True)
+        return
+
+    view = View()
+    view.add_item(Button(label="Click Here 🔗", url=links[0], style=discord.ButtonStyle.link))
+    color = 0x00ffcc if not MAINTENANCE else 0xFFA500
+    embed = discord.Embed(title="⚠️ Latest SAB Scammer PS Link 🔗", description="Click the button below to visit the link.", color=color)
+    embed.set_image(url="https://pbs.twimg.com/media/GvwdBD4XQAAL-u0.jpg")
+    embed.set_footer(text=f"DM @h.aze.l for bug reports | Made by SAB-RS | Links {freshness_text()}")
+    await interaction.response.send_message(embed=embed, view=view)
+
+# ---- Link subscriptions (push) ----
+FANOUT_DELAY = 0.25
+FANOUT_BURST = 20
+_fanout_queue = asyncio.Queue()
+_fanout_task = None
+
+def on_new_wall_links(links):
+    _fanout_queue.put_nowait(list(links))
+
+def link_push_message(link):
+    view = View()
+    view.add_item(Button(label="Click Here 🔗", url=link, style=discord.ButtonStyle.link))
+    embed = discord.Embed(title="🔔 New SAB Scammer PS Link 🔗", description="A new link was just posted. Click the button below to visit it.", color=0x00ffcc)
+    embed.set_footer(text="DM @h.aze.l for bug reports | Made by SAB-RS | /unsubscribe to stop")
+    return embed, view
+
+async def fanout_worker():
+    """Post each new wall link once to every subscribed channel, paced like /announce."""
+    while True:
+        links = await _fanout_queue.get()
+        sent = 0
+        for gid, channel_id in await list_subscriptions():
+            if await find_banned_guild_entry(gid):
+                continue
+            channel = client.get_channel(channel_id)
+            if channel is None:
+                # channel (or the whole guild) is gone
+                await remove_subscription(gid)
+                continue
+            # oldest first, and skip anything this guild already pulled with /links
+            for link in await db_call(record_new_links, gid, links[::-1]):
+                embed, view = link_push_message(link)
+                try:
+                    await channel.send(embed=embed, view=view)
+                    sent += 1
+                except discord.NotFound:
+                    await remove_subscription(gid)
+                    break
+                except discord.Forbidden:
+                    break
+                except Exception as e:
+                    print(f"[ERROR] fanout to {gid}/{channel_id}: {e}")
+                    break
+                if sent % FANOUT_BURST == 0:
+                    await asyncio.sleep(1.2)
+                await asyncio.sleep(FANOUT_DELAY)
+
+def start_fanout_worker():
+    global _fanout_task
+    if _fanout_task is None or _fanout_task.done():
+        _fanout_task = client.loop.create_task(fanout_worker())
+
+@tree.command(name="subscribe", description="Post new scammer PS links to a channel automatically")
+@app_commands.guild_only()
+@app_commands.default_permissions(manage_guild=True)
+@app_commands.checks.has_permissions(manage_guild=True)
+@app_commands.describe(channel="Channel to post new links in")
+async def subscribe(interaction: discord.Interaction, channel: discord.TextChannel):
+    if await check_guild_ban(interaction):
+        return
+    if await check_user_ban(interaction):
+        return
+    perms = channel.permissions_for(interaction.guild.me)
+    if not (perms.send_messages and perms.view_channel and perms.embed_links):
+        await interaction.response.send_message(f"❌ I can't post embeds in {channel.mention}.", ephemeral=True)
+        return
+    await set_subscription(interaction.guild_id, channel.id)
+    # only push links posted from now on
+    await db_call(record_new_links, interaction.guild_id, get_snapshot().links)
+    await interaction.response.send_message(f"✅ New links will be posted in {channel.mention}.", ephemeral=True)
+
+@tree.command(name="unsubscribe", description="Stop posting new scammer PS links in this server")
+@app_commands.guild_only()
+@app_commands.default_permissions(manage_guild=True)
+@app_commands.checks.has_permissions(manage_guild=True)
+async def unsubscribe(interaction: discord.Interaction):
+    await remove_subscription(interaction.guild_id)
+    await interaction.response.send_message("✅ Unsubscribed from new links.", ephemeral=True)
+
+@tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    # e.g. /subscribe without Manage Server: say so instead of "This interaction failed"
+    if isinstance(error, app_commands.MissingPermissions):
+        perms = ", ".join(p.replace("_", " ").replace("guild", "server").title() for p in error.missing_permissions)
+        msg = f"❌ You need the **{perms}** permission to use this command."
+        if interaction.response.is_done():
+            await interaction.followup.send(msg, ephemeral=True)
+        else:
+            await interaction.response.send_message(msg, ephemeral=True)
+        return
+    await app_commands.CommandTree.on_error(tree, interaction, error)
+
+# ---- /wall_status (operators) ----
+@tree.command(name="wall_status", description="Show group-wall poller status (owner-only)")
+@owner_only()
+async def wall_status(interaction: discord.Interaction):
+    snap = get_snapshot()
+    sched = scheduler.stats()
+    brk = breaker.stats()
+    wall = wall_stats()
+    http = http_stats()
+    fs = seen_filter.stats()
+    age = f"{snap.age:.0f}s" if snap.age is not None else "never"
+    lines = [
+        f"**Snapshot:** v{snap.version} | {len(snap.links)} links | age {age}",
+        f"**Poll interval:** {sched['interval']:.0f}s | hit rate {sched['hit_rate']:.0%} ({sched['hits']}/{sched['polls']})",
+        f"**Failures:** {sched['failures']} | 429s: {sched['rate_limited']}",
+        f"**Breaker:** {brk['state']} | {brk['consecutive_failures']} in a row | {brk['total_failures']} total | tripped {brk['trips']}x"
+        + (f" | retry in {brk['retry_in']:.0f}s" if brk['retry_in'] else ""),
+        f"**Pages:** {wall['pages']} | 304: {wall['not_modified']} | unchanged: {wall['digest_hits']} | {wall['bytes']} bytes",
+        f"**HTTP:** {http['requests']} requests | reuse {http['reuse_ratio']:.0%}",
+        f"**Seen filter:** {fs['guilds']} guilds, {fs['bytes'] // 1024} KiB | {fs['definite_misses']} skipped DB,"
+        f" {fs['maybe_seen']} checked ({fs['false_positives']} false +) | {fs['rebuilds']} builds, {fs['evictions']} evicted",
+        f"**Subscriptions:** {len(await list_subscriptions())} | fan-out queue {_fanout_queue.qsize()}",
+    ]
+    await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+# ---- /db_stats (operators) ----
+@tree.command(name="db_stats", description="Show database query latency and lock waits (owner-only)")
+@owner_only()
+@app_commands.describe(top="How many statements to list, by total time")
+async def db_stats_command(interaction: discord.Interaction, top: int = 8):
+    stats = db_stats()
+    group = group_commit_stats()
+    waits = stats["lock_wait"]
+    lines = [
+        f"**Slow threshold:** {stats['slow_ms']:.0f} ms",
+        *(f"**Waits for {kind}:** {w['count']} contended | p50 {w['p50_ms']} ms | p99 {w['p99_ms']} ms"
+          f" | max {w['max_ms']:.1f} ms | total {w['total_ms'] / 1000:.1f}s" for kind, w in waits.items()),
+        f"**Group commit:** {group['groups']} commits | {group['statements']} statements | largest {group['largest']}",
+    ]
+    ranked = sorted(stats["statements"].items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+    for sql, st in ranked[:max(1, min(top, 20))]:
+        short = sql if len(sql) <= 90 else sql[:87] + "..."
+        lines.append(f"`{short}`\n  {st['count']}x | p50 {st['p50_ms']} ms | p99 {st['p99_ms']} ms | max {st['max_ms']:.1f} ms"
+                     f" | total {st['total_ms'] / 1000:.1f}s | {st['rows']} rows | {st['slow']} slow")
+    text = "\n".join(lines)
+    if len(text) > 1990:
+        text = text[:1990] + "\n…"
+    await interaction.response.send_message(text, ephemeral=True)
+
 # ---- here only changes: ban_user + tempban + gban auto-leave ----
 @tree.command(name="ban_user", description="Ban a user (owner-only)")
 @owner_only()
@@ -299,10 +560,10 @@ async def ban_user(interaction: discord.Interaction, user_id: str, reason: str,
     if not uid:
         await interaction.response.send_message("❌ Invalid user ID.", ephemeral=True)
         return
-    if find_banned_user_entry(uid):
+    if await find_banned_user_entry(uid):
         await interaction.response.send_message("⚠️ User already banned.", ephemeral=True)
         return
-    add_banned_user(uid, reason, no_appeal, gban)
+    await add_banned_user(uid, reason, no_appeal, gban)
     await interaction.response.send_message(f"✅ User `{uid}` banned (gban: {gban}).\n**Reason:** {reason}", ephemeral=True)
 
 @tree.command(name="tempban", description="Temporarily ban a user (owner-only)")
@@ -313,19 +574,19 @@ async def tempban(interaction: discord.Interaction, user_id: str, duration_minut
     if not uid:
         await interaction.response.send_message("❌ Invalid user ID.", ephemeral=True)
         return
-    if find_banned_user_entry(uid) or get_tempban(uid):
+    if await find_banned_user_entry(uid) or await get_tempban(uid):
         await interaction.response.send_message("⚠️ User already banned.", ephemeral=True)
         return
     expires_at = int(time.time()) + max(1, duration_minutes) * 60
-    add_tempban(uid, expires_at, reason, gban=gban)
+    await add_tempban(uid, expires_at, reason, gban=gban)
     await interaction.response.send_message(f"✅ User `{uid}` tempbanned for {duration_minutes} minutes (gban: {gban}).\n**Reason:** {reason}", ephemeral=True)
 
 @client.event
 async def on_guild_join(guild):
     owner = guild.owner
     if owner:
-        entry = find_banned_user_entry(owner.id)
-        if entry and entry.get("gban"):
+        entry = await find_banned_user_entry(owner.id)
+        if entry and entry.gban:
             print(f"⚠️ Banned user {owner} tried adding the bot to {guild.name} ({guild.id})")
             await guild.leave()
             return
@@ -341,12 +602,12 @@ async def ban_guild(interaction: discord.Interaction, guild_id: str, reason: str
     if not gid:
         await interaction.response.send_message("❌ Invalid guild ID.", ephemeral=True)
         return
-    if find_banned_guild_entry(gid):
+    if await find_banned_guild_entry(gid):
         await interaction.response.send_message("⚠️ Guild already banned.", ephemeral=True)
         return
     g = client.get_guild(gid)
     name = g.name if g else None
-    add_banned_guild(gid, name, reason, no_appeal)
+    await add_banned_guild(gid, name, reason, no_appeal)
     guild_obj = client.get_guild(gid)
     if guild_obj:
         try:
@@ -363,10 +624,10 @@ async def unban_guild(interaction: discord.Interaction, guild_id: str):
     if not gid:
         await interaction.response.send_message("❌ Invalid guild ID.", ephemeral=True)
         return
-    entry = find_banned_guild_entry(gid)
+    entry = await find_banned_guild_entry(gid)
     removed = False
     if entry:
-        remove_banned_guild(gid)
+        await remove_banned_guild(gid)
         removed = True
     await interaction.response.send_message(f"✅ Guild `{gid}` unbanned." if removed else "⚠️ Guild not in banned list.", ephemeral=True)
 
@@ -381,12 +642,11 @@ async def ban_invite(interaction: discord.Interaction, invite: str, reason: str,
     code = m.group(1)
     url = f"https://discord.com/api/v10/invites/{code}?with_counts=false"
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                if resp.status != 200:
-                    await interaction.response.send_message(f"❌ Failed to resolve invite (HTTP {resp.status}).", ephemeral=True)
-                    return
-                data = await resp.json()
+        async with get_http_session().get(url) as resp:
+            if resp.status != 200:
+                await interaction.response.send_message(f"❌ Failed to resolve invite (HTTP {resp.status}).", ephemeral=True)
+                return
+            data = await resp.json()
     except Exception as e:
         await interaction.response.send_message(f"❌ Error fetching invite: {e}", ephemeral=True)
         return
@@ -396,22 +656,22 @@ async def ban_invite(interaction: discord.Interaction, invite: str, reason: str,
         return
     gid = int(guild["id"])
     name = guild.get("name", "Unknown")
-    if find_banned_guild_entry(gid):
+    if await find_banned_guild_entry(gid):
         await interaction.response.send_message(f"⚠️ Guild **{name}** already banned.", ephemeral=True)
         return
-    add_banned_guild(gid, name, reason, no_appeal)
+    await add_banned_guild(gid, name, reason, no_appeal)
     await interaction.response.send_message(f"✅ Guild `{name}` (ID: `{gid}`) banned.\n**Reason:** {reason}", ephemeral=True)
 
 # ---- listing commands ----
 @tree.command(name="list_banned", description="List all banned guilds (owner-only)")
 @owner_only()
 async def list_banned(interaction: discord.Interaction):
-    rows = db_exec("SELECT * FROM banned_guilds ORDER BY timestamp DESC", fetchall=True) or []
+    rows = await db_fetch_records(BannedGuild, SELECT_BANNED_GUILDS)
     lines = []
     for i, e in enumerate(rows, start=1):
-        gid = e["id"]
-        name = e["name"] or (client.get_guild(gid).name if client.get_guild(gid) else "Unknown")
-        reason = e["reason"] or "No reason recorded"
+        gid = e.id
+        name = e.name or (client.get_guild(gid).name if client.get_guild(gid) else "Unknown")
+        reason = e.reason or "No reason recorded"
         lines.append(f"{i}. {name} | {gid} | Reason: {reason}")
     text = "\n".join(lines) or "No banned guilds."
     if len(text) <= 1800:
@@ -425,14 +685,14 @@ async def list_banned(interaction: discord.Interaction):
 @tree.command(name="list_banned_users", description="List all banned users (owner-only)")
 @owner_only()
 async def list_banned_users(interaction: discord.Interaction):
-    rows = db_exec("SELECT * FROM banned_users ORDER BY timestamp DESC", fetchall=True) or []
+    rows = await db_fetch_records(BannedUser, SELECT_BANNED_USERS)
     lines = []
     for i, e in enumerate(rows, start=1):
-        uid = e["id"]
-        reason = e["reason"] or "No reason recorded"
-        ts = e["timestamp"]
+        uid = e.id
+        reason = e.reason or "No reason recorded"
+        ts = e.timestamp
         ts_text = f" | Banned at: {int(ts)}" if ts else ""
-        gban_text = " | GBAN" if e.get("gban") else ""
+        gban_text = " | GBAN" if e.gban else ""
         lines.append(f"{i}. {uid} | Reason: {reason}{ts_text}{gban_text}")
     text = "\n".join(lines) or "No banned users."
     if len(text) <= 1800:
@@ -446,8 +706,8 @@ async def list_banned_users(interaction: discord.Interaction):
 @tree.command(name="list_removed", description="List removed guilds (owner-only)")
 @owner_only()
 async def list_removed(interaction: discord.Interaction):
-    rows = list_removed_guilds() or []
-    lines = [f"{i+1}. {r['name'] or 'Unknown'} | {r['id']}" for i, r in enumerate(rows)]
+    rows = await list_removed_guilds()
+    lines = [f"{i+1}. {r.name or 'Unknown'} | {r.id}" for i, r in enumerate(rows)]
     text = "\n".join(lines) or "No removed guilds."
     if len(text) <= 1800:
         await interaction.response.send_message(f"**Removed guilds:**\n{text}", ephemeral=True)
@@ -542,6 +802,7 @@ async def update_tree(interaction: discord.Interaction):
 # ---- events ----
 @client.event
 async def on_ready():
+    await open_http_session()
     try:
         await tree.sync()
     except Exception:
@@ -550,22 +811,26 @@ async def on_ready():
     print(f"In {len(client.guilds)} guilds.")
     total_members = sum((g.member_count or 0) for g in client.guilds)
     print(f"Reaching approx {total_members} members.")
+    start_wall_poller(LINK_MODE)
+    start_fanout_worker()
 
     async def periodic_cleanup():
         while True:
             await asyncio.sleep(3600 * 6)
-            clean_old_links_global()
+            await asyncio.to_thread(clean_old_links_global)
             now = int(time.time())
-            db_exec("DELETE FROM temp_bans WHERE expires <= ?", (now,), commit=True)
+            await db_execute("DELETE FROM temp_bans WHERE expires <= ?", (now,))
 
     client.loop.create_task(periodic_cleanup())
 
 @client.event
 async def on_guild_remove(guild):
     print(f"Removed from guild: {guild.name} | {guild.id}")
-    add_removed_guild(guild.id, guild.name)
+    await add_removed_guild(guild.id, guild.name)
+
+add_new_links_listener(on_new_wall_links)
 
 # ---- start services ----
 if __name__ == "__main__":
     threading.Thread(target=run_flask, daemon=True).start()
-    client.run(TOKEN)
+    run_client(client, TOKEN)
@@ -0,0 +1,226 @@
+# migrations.py - versioned schema for main.py's SQLite database
+#
+# PRAGMA user_version holds the number of the last migration applied. At
+# startup run_migrations() applies every newer one in order, each in its own
+# transaction together with the version bump, then refreshes the planner's
+# statistics with ANALYZE.
+#
+# Databases from before versioning report version 0 whatever their layout, so
+# the early migrations are written to be safe on any of those.
+from db import transaction
+from link_extract import canonical_link
+
+
+def _columns(cur, table):
+    return [r["name"] for r in cur.execute(f"PRAGMA table_info({table})")]
+
+
+def m001_base_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS banned_guilds (
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        reason TEXT,
+        timestamp INTEGER,
+        no_appeal INTEGER DEFAULT 0
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS removed_guilds (
+        id INTEGER,
+        name TEXT,
+        timestamp INTEGER
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS banned_users (
+        id INTEGER PRIMARY KEY,
+        reason TEXT,
+        timestamp INTEGER,
+        no_appeal INTEGER DEFAULT 0,
+        gban INTEGER DEFAULT 0
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS temp_bans (
+        id INTEGER PRIMARY KEY,
+        expires INTEGER,
+        reason TEXT,
+        no_appeal INTEGER DEFAULT 0,
+        gban INTEGER DEFAULT 0
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS link_subscriptions (
+        guild_id INTEGER PRIMARY KEY,
+        channel_id INTEGER,
+        created INTEGER
+    )
+    """)
+
+
+# Each canonical link is stored once in `links`; seen_links holds integer
+# (guild_id, link_id) pairs. The (guild_id, first_seen) index covers the
+# newest-first reads and lets trims delete an index range.
+SEEN_LINKS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS links (
+        id INTEGER PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        first_seen INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS seen_links (
+        guild_id INTEGER NOT NULL,
+        link_id INTEGER NOT NULL,
+        first_seen INTEGER NOT NULL,
+        PRIMARY KEY (guild_id, link_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_seen_links_guild_first_seen ON seen_links (guild_id, first_seen)",
+]
+
+
+def _canonical_key(url):
+    # None for what can't become a key (empty, or a URL urlsplit rejects):
+    # no lookup could ever match such a row again
+    if not isinstance(url, str) or not url.strip():
+        return None
+    key = canonical_link(url)
+    return None if key.lower().startswith(("http://", "https://")) else key
+
+
+def _canonicalize_links(cur):
+    """
+    Rewrite links.url to canonical_link() keys. Links that collapse to one key
+    are merged, and so are each guild's rows for them, keeping the earliest
+    first_seen; links with no key are dropped along with their rows.
+    """
+    cur.connection.create_function("canonical_key", 1, _canonical_key, deterministic=True)
+    cur.execute("CREATE TEMP TABLE link_rekey (id INTEGER PRIMARY KEY, url TEXT)")
+    cur.execute("""
+        INSERT INTO link_rekey (id, url)
+        SELECT id, key FROM (SELECT id, url, canonical_key(url) AS key FROM links) WHERE key IS NOT url
+    """)
+    rekeyed = cur.rowcount
+    if rekeyed:
+        print(f"[DB] rewriting {rekeyed} stored links as canonical keys")
+        cur.execute("""
+            INSERT INTO links (url, first_seen)
+            SELECT r.url, MIN(l.first_seen) FROM link_rekey r JOIN links l ON l.id = r.id
+            WHERE r.url IS NOT NULL GROUP BY r.url
+            ON CONFLICT (url) DO UPDATE SET first_seen = MIN(first_seen, excluded.first_seen)
+        """)
+        cur.execute("""
+            INSERT INTO seen_links (guild_id, link_id, first_seen)
+            SELECT s.guild_id, l.id, MIN(s.first_seen)
+            FROM seen_links s JOIN link_rekey r ON r.id = s.link_id JOIN links l ON l.url = r.url
+            GROUP BY s.guild_id, l.id
+            ON CONFLICT (guild_id, link_id) DO UPDATE SET first_seen = MIN(first_seen, excluded.first_seen)
+        """)
+        cur.execute("DELETE FROM seen_links WHERE link_id IN (SELECT id FROM link_rekey)")
+        cur.execute("DELETE FROM links WHERE id IN (SELECT id FROM link_rekey)")
+    cur.execute("DROP TABLE link_rekey")
+
+
+def m002_interned_seen_links(cur):
+    if "link" in _columns(cur, "seen_links"):
+        # older layouts stored the link text in every guild's row, keyed either
+        # on the link alone or on (guild_id, link), and rows from before
+        # canonical keys hold the URL as posted
+        print("[DB] migrating seen_links to interned link ids")
+        cur.execute("DROP INDEX IF EXISTS idx_seen_links_guild_first_seen")
+        cur.execute("ALTER TABLE seen_links RENAME TO seen_links_old")
+        for stmt in SEEN_LINKS_SCHEMA[:2]:
+            cur.execute(stmt)
+        cur.execute("""
+            INSERT OR IGNORE INTO links (url, first_seen)
+            SELECT link, MIN(COALESCE(first_seen, 0)) FROM seen_links_old GROUP BY link
+        """)
+        cur.execute("""
+            INSERT OR IGNORE INTO seen_links (guild_id, link_id, first_seen)
+            SELECT COALESCE(o.guild_id, 0), l.id, COALESCE(o.first_seen, 0)
+            FROM seen_links_old o JOIN links l ON l.url = o.link
+        """)
+        cur.execute("DROP TABLE seen_links_old")
+        _canonicalize_links(cur)
+    for stmt in SEEN_LINKS_SCHEMA:
+        cur.execute(stmt)
+
+
+def m003_hot_query_indexes(cur):
+    # periodic_cleanup's expiry delete and the three newest-first listings
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_temp_bans_expires ON temp_bans (expires)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_banned_users_timestamp ON banned_users (timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_banned_guilds_timestamp ON banned_guilds (timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_removed_guilds_timestamp ON removed_guilds (timestamp)")
+
+
+def m004_legacy_json_tables(cur):
+    # state only the JSON bots kept, so import_legacy.py has somewhere to put it:
+    # Personal_Client.py's resolved invites and Lal.py's blacklist
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS invite_cache (
+        code TEXT PRIMARY KEY,
+        guild_id INTEGER,
+        data TEXT NOT NULL
+    ) WITHOUT ROWID
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS blacklisted_users (
+        id INTEGER PRIMARY KEY
+    )
+    """)
+
+
+def m005_seen_links_link_index(cur):
+    # clean_old_links_global's orphan sweep looks up each link id in seen_links;
+    # the primary key leads with guild_id, so without this every lookup is a scan
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_seen_links_link ON seen_links (link_id)")
+
+
+def m006_canonical_links(cur):
+    # databases m002 already ran on (or interned before versioning) can still
+    # hold URLs as posted; seen-link lookups match canonical keys only
+    _canonicalize_links(cur)
+
+
+MIGRATIONS = [
+    (1, m001_base_tables),
+    (2, m002_interned_seen_links),
+    (3, m003_hot_query_indexes),
+    (4, m004_legacy_json_tables),
+    (5, m005_seen_links_link_index),
+    (6, m006_canonical_links),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version():
+    with transaction() as cur:
+        return cur.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations():
+    """Bring the database up to SCHEMA_VERSION; returns the versions applied."""
+    current = schema_version()
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(f"database is at schema v{current}, newer than this code (v{SCHEMA_VERSION})")
+    applied = []
+    for version, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        with transaction() as cur:
+            # sqlite3 only opens a transaction by itself before INSERT/UPDATE/
+            # DELETE; without this each CREATE/ALTER/DROP would commit on its own
+            if not cur.connection.in_transaction:
+                cur.execute("BEGIN")
+            migrate(cur)
+            cur.execute(f"PRAGMA user_version={version}")
+        applied.append(version)
+        print(f"[DB] applied migration {version}: {migrate.__name__}")
+    if applied:
+        with transaction() as cur:
+            cur.execute("ANALYZE")
+    return applied
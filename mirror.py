@@ -1,15 +1,20 @@
 # main.py  - PART 1
 import os
 import re
+import sys
 import threading
 import json
 import io
 import time
+import asyncio
 import discord
 from discord import app_commands
 from flask import Flask
-import aiohttp
+from http_client import open_http_session, get_http_session, run_client
 from discord.ui import View, Button
+from roblox_wall import get_snapshot, start_wall_poller, revalidate_if_stale, freshness_text
+from link_extract import canonical_link, STRICT
+from link_ring import LinkRing
 
 # ---- Secrets / config ----
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -158,71 +163,134 @@ async def check_guild_ban(interaction: discord.Interaction):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return True
     return False
-# ---- Fetch group posts ----
+# ---- Group wall links ----
+# only accept /share/ links
+LINK_MODE = STRICT
 MEMORY_FILE = "seen_links.json"
+# new links are appended here and folded into MEMORY_FILE by compact_in_background()
+JOURNAL_FILE = "seen_links.journal"
+JOURNAL_COMPACT_BYTES = int(os.getenv("SEEN_JOURNAL_COMPACT_BYTES", str(1 << 20)))
+SEEN_RING_CAPACITY = int(os.getenv("SEEN_RING_CAPACITY", "1000"))  # most recent links remembered per guild
 
 def load_seen_links():
     if os.path.exists(MEMORY_FILE):
         try:
             with open(MEMORY_FILE, "r") as f:
-                return json.load(f)  # dict of guild_id -> list
+                # {"links": [key, ...], "guilds": {guild_id: "space-separated indexes into links"}}
+                # older files: {guild_id: newline-joined keys or a list of links}
+                return json.load(f)
         except:
             return {}
     return {}
 
 def save_seen_links(data):
-    with open(MEMORY_FILE, "w") as f:
+    tmp = MEMORY_FILE + ".tmp"
+    with open(tmp, "w") as f:
         json.dump(data, f)
-def clean_old_links():
+    os.replace(tmp, MEMORY_FILE)
+
+def replay_journal(index, path):
+    """Apply journal lines to index; a torn last line from a crash is skipped."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            ring = index.get(entry["g"])
+            if ring is None:
+                ring = index[entry["g"]] = LinkRing(SEEN_RING_CAPACITY)
+            for key in entry["l"]:
+                ring.add(sys.intern(key))
+
+def load_seen_index():
+    # keys are interned, so a link seen by many guilds is one string in memory
     data = load_seen_links()
-    modified = False
-    for gid, links in data.items():
-        if len(links) > 1000:  # cap at 1000 stored links per guild
-            data[gid] = links[-500:]  # keep only the most recent 500
-            modified = True
-    if modified:
-        save_seen_links(data)
-        print("🧹 cleaned old links from memory file")
-async def fetch_group_posts(guild_id=None):
-    if not GROUP_ID:
-        return []
+    index = {}
+    if "guilds" in data:
+        links = [sys.intern(k) for k in data.get("links", [])]
+        for gid, ids in data["guilds"].items():
+            index[gid] = LinkRing(SEEN_RING_CAPACITY, (links[int(i)] for i in ids.split()))
+    else:
+        for gid, stored in data.items():
+            if isinstance(stored, str):
+                stored = stored.split("\n") if stored else []
+            index[gid] = LinkRing(SEEN_RING_CAPACITY, (sys.intern(canonical_link(l)) for l in stored))
+    replay_journal(index, JOURNAL_FILE + ".old")
+    replay_journal(index, JOURNAL_FILE)
+    return index
 
-    # load or init guild-specific memory
-    seen_links = load_seen_links()
-    if str(guild_id) not in seen_links:
-        seen_links[str(guild_id)] = []
+SEEN_LINKS = load_seen_index()
 
-    url = f"https://groups.roblox.com/v2/groups/{GROUP_ID}/wall/posts?sortOrder=Desc&limit=100"
-    headers = {"Cookie": f".ROBLOSECURITY={ROBLOX_COOKIE}"} if ROBLOX_COOKIE else {}
+def journal_seen_links(gid, keys):
+    with open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"g": gid, "l": keys}) + "\n")
 
+def journal_size():
+    try:
+        return os.path.getsize(JOURNAL_FILE)
+    except OSError:
+        return 0
+
+def write_seen_snapshot(guilds):
+    """Save {guild_id: [key, ...]} as MEMORY_FILE, then drop the rotated journal."""
+    # each distinct link is written once; guilds refer to it by position
+    ids = {}
+    by_guild = {gid: " ".join(str(ids.setdefault(key, len(ids))) for key in keys) for gid, keys in guilds.items()}
+    save_seen_links({"links": list(ids), "guilds": by_guild})
+    if os.path.exists(JOURNAL_FILE + ".old"):
+        os.remove(JOURNAL_FILE + ".old")
+
+_compacting = False
+
+async def compact_in_background():
+    """Fold the journal into MEMORY_FILE (the rings already bound each guild)."""
+    global _compacting
+    if _compacting:
+        return
+    _compacting = True
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as resp:
-                if resp.status != 200:
-                    print(f"⚠️ Failed to fetch posts: {resp.status}")
-                    return []
-                data = await resp.json()
+        # SEEN_LINKS and the journal are only touched on the event loop: copy
+        # the rings and rotate the journal here, in one step, so anything
+        # journaled later lands in a fresh file; only the writing is threaded
+        guilds = {gid: list(ring) for gid, ring in SEEN_LINKS.items()}
+        # a .old left by a failed save isn't in MEMORY_FILE yet; keep it
+        if os.path.exists(JOURNAL_FILE) and not os.path.exists(JOURNAL_FILE + ".old"):
+            os.replace(JOURNAL_FILE, JOURNAL_FILE + ".old")
+        await asyncio.to_thread(write_seen_snapshot, guilds)
     except Exception as e:
-        print(f"[ERROR] fetch_group_posts: {e}")
+        print(f"[ERROR] compacting seen links: {e}")
+    finally:
+        _compacting = False
+
+def take_new_links(guild_id=None):
+    """Return wall links this guild hasn't been shown yet and remember them."""
+    snapshot = get_snapshot()
+    revalidate_if_stale()
+    if not snapshot.links:
         return []
 
+    gid = str(guild_id)
+    ring = SEEN_LINKS.get(gid)
+    if ring is None:
+        ring = SEEN_LINKS[gid] = LinkRing(SEEN_RING_CAPACITY)
     unique_links = []
-    existing = set(seen_links[str(guild_id)])
-
-    for post in data.get("data", []):
-        content = post.get("body", "")
-        # only accept /share/ links
-        found = re.findall(r"https?://www\.roblox\.com/share(?:[/?][A-Za-z0-9_\-=&?#%]+)?", content)
-
-        for link in found:
-            if link not in existing:
-                existing.add(link)
-                unique_links.append(link)
-
-    # save updated memory
-    seen_links[str(guild_id)] = list(existing)
-    if unique_links:
-        save_seen_links(seen_links)
+    new_keys = []
+    # the snapshot is newest first; add oldest first so the ring (and the
+    # journal replaying into it) evicts this batch's oldest links first
+    for link in reversed(snapshot.links):
+        key = sys.intern(canonical_link(link))
+        if ring.add(key):
+            new_keys.append(key)
+            unique_links.append(link)
+    unique_links.reverse()
+
+    if new_keys:
+        journal_seen_links(gid, new_keys)
+        if journal_size() > JOURNAL_COMPACT_BYTES:
+            asyncio.get_running_loop().create_task(compact_in_background())
 
     return unique_links
 
@@ -251,10 +319,9 @@ async def links_command(interaction: discord.Interaction):
     if await check_user_ban(interaction):
         return
 
-    await interaction.response.defer(thinking=True)
-    links = await fetch_group_posts(interaction.guild_id)
+    links = take_new_links(interaction.guild_id)
     if not links:
-        await interaction.followup.send("No roblox.com/share links found 😢")
+        await interaction.response.send_message("No roblox.com/share links found 😢")
         return
 
     pretty = [f"[Click Here ({i})]({l})" for i, l in enumerate(links[:10], start=1)]
@@ -271,9 +338,9 @@ async def links_command(interaction: discord.Interaction):
         color=0x00ffcc if not MAINTENANCE else 0xFFA500
     )
     embed.set_image(url="https://pbs.twimg.com/media/GvwdBD4XQAAL-u0.jpg")
-    embed.set_footer(text="DM @h.aze.l for bug reports | Made by SAB-RS")
+    embed.set_footer(text=f"DM @h.aze.l for bug reports | Made by SAB-RS | Links {freshness_text()}")
 
-    await interaction.followup.send(embed=embed)
+    await interaction.response.send_message(embed=embed)
 
 
 # ---- /onelink command ----
@@ -286,10 +353,9 @@ async def onelink_command(interaction: discord.Interaction):
         if await check_user_ban(interaction):
             return
 
-        await interaction.response.defer(thinking=True)
-        links = await fetch_group_posts(interaction.guild_id)
+        links = take_new_links(interaction.guild_id)
         if not links:
-            await interaction.followup.send("No roblox.com/share links found 😢", ephemeral=True)
+            await interaction.response.send_message("No roblox.com/share links found 😢", ephemeral=True)
             return
 
         first_link = links[0]
@@ -303,14 +369,17 @@ async def onelink_command(interaction: discord.Interaction):
             color=color
         )
         embed.set_image(url="https://pbs.twimg.com/media/GvwdBD4XQAAL-u0.jpg")
-        embed.set_footer(text="DM @h.aze.l for bug reports | Made by SAB-RS")
+        embed.set_footer(text=f"DM @h.aze.l for bug reports | Made by SAB-RS | Links {freshness_text()}")
 
-        await interaction.followup.send(embed=embed, view=view)
+        await interaction.response.send_message(embed=embed, view=view)
 
     except Exception as e:
         print(f"[ERROR] /onelink: {e}")
         try:
-            await interaction.followup.send(f"⚠️ Error while running command:\n```{e}```", ephemeral=True)
+            if interaction.response.is_done():
+                await interaction.followup.send(f"⚠️ Error while running command:\n```{e}```", ephemeral=True)
+            else:
+                await interaction.response.send_message(f"⚠️ Error while running command:\n```{e}```", ephemeral=True)
         except:
             pass
 
@@ -416,12 +485,11 @@ async def ban_invite(interaction: discord.Interaction, invite: str, reason: str)
     code = m.group(1)
     url = f"https://discord.com/api/v10/invites/{code}?with_counts=false"
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                if resp.status != 200:
-                    await interaction.response.send_message(f"❌ Failed to resolve invite (HTTP {resp.status}).", ephemeral=True)
-                    return
-                data = await resp.json()
+        async with get_http_session().get(url) as resp:
+            if resp.status != 200:
+                await interaction.response.send_message(f"❌ Failed to resolve invite (HTTP {resp.status}).", ephemeral=True)
+                return
+            data = await resp.json()
     except Exception as e:
         await interaction.response.send_message(f"❌ Error fetching invite: {e}", ephemeral=True)
         return
@@ -568,15 +636,17 @@ async def on_guild_remove(guild):
     save_json(REMOVED_LOG, REMOVED_GUILDS)
 @client.event
 async def on_ready():
+    await open_http_session()
     print(f"✅ Logged in as {client.user}")
-    
+    start_wall_poller(LINK_MODE)
+
     async def periodic_cleanup():
         while True:
             await asyncio.sleep(3600 * 6)  # every 6 hours
-            clean_old_links()
+            await compact_in_background()
 
     client.loop.create_task(periodic_cleanup())
 # ---- start services ----
 if __name__ == "__main__":
     threading.Thread(target=run_flask, daemon=True).start()
-    client.run(TOKEN)
+    run_client(client, TOKEN)
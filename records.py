@@ -0,0 +1,74 @@
+# records.py - typed rows for main.py's tables
+#
+# Each class lists its columns once, in the order its SELECT returns them, so
+# a raw tuple row maps straight onto __init__ without building a dict or a
+# sqlite3.Row. The SELECTs are plain module constants, which keeps them in
+# sqlite3's per-connection statement cache.
+
+
+def _select(cls, table, where="", order=""):
+    sql = f"SELECT {', '.join(cls.__slots__)} FROM {table}"
+    if where:
+        sql += f" WHERE {where}"
+    if order:
+        sql += f" ORDER BY {order}"
+    return sql
+
+
+class BannedUser:
+    __slots__ = ("id", "reason", "timestamp", "no_appeal", "gban")
+
+    def __init__(self, id, reason, timestamp, no_appeal, gban):
+        self.id = id
+        self.reason = reason
+        self.timestamp = timestamp
+        self.no_appeal = bool(no_appeal)
+        self.gban = bool(gban)
+
+
+class TempBan:
+    __slots__ = ("id", "expires", "reason", "no_appeal", "gban")
+
+    def __init__(self, id, expires, reason, no_appeal, gban):
+        self.id = id
+        self.expires = expires
+        self.reason = reason
+        self.no_appeal = bool(no_appeal)
+        self.gban = bool(gban)
+
+
+class BannedGuild:
+    __slots__ = ("id", "name", "reason", "timestamp", "no_appeal")
+
+    def __init__(self, id, name, reason, timestamp, no_appeal):
+        self.id = id
+        self.name = name
+        self.reason = reason
+        self.timestamp = timestamp
+        self.no_appeal = bool(no_appeal)
+
+
+class RemovedGuild:
+    __slots__ = ("id", "name", "timestamp")
+
+    def __init__(self, id, name, timestamp):
+        self.id = id
+        self.name = name
+        self.timestamp = timestamp
+
+
+class Subscription:
+    __slots__ = ("guild_id", "channel_id")
+
+    def __init__(self, guild_id, channel_id):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+
+
+SELECT_BANNED_USER = _select(BannedUser, "banned_users", "id=?") + " LIMIT 1"
+SELECT_BANNED_USERS = _select(BannedUser, "banned_users", order="timestamp DESC")
+SELECT_TEMPBAN = _select(TempBan, "temp_bans", "id=? AND expires > ?") + " LIMIT 1"
+SELECT_BANNED_GUILD = _select(BannedGuild, "banned_guilds", "id=?") + " LIMIT 1"
+SELECT_BANNED_GUILDS = _select(BannedGuild, "banned_guilds", order="timestamp DESC")
+SELECT_REMOVED_GUILDS = _select(RemovedGuild, "removed_guilds", order="timestamp DESC")
+SELECT_SUBSCRIPTIONS = _select(Subscription, "link_subscriptions")
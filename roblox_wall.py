@@ -0,0 +1,582 @@
+# roblox_wall.py - shared Roblox group-wall poller
+#
+# One background task per process fetches the group walls and publishes a
+# versioned snapshot of the extracted links. Slash commands read the snapshot
+# instead of hitting groups.roblox.com themselves.
+import os
+import json
+import time
+import heapq
+import random
+import hashlib
+import asyncio
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from http_client import get_http_session
+from link_extract import find_links, canonical_link, STRICT
+
+# ---- Config / Secrets ----
+GROUP_ID = os.getenv("GROUP_ID")
+# GROUP_IDS="123,456" serves several walls as one feed; falls back to GROUP_ID
+GROUP_IDS = [g.strip() for g in (os.getenv("GROUP_IDS") or GROUP_ID or "").split(",") if g.strip()]
+WALL_CONCURRENCY = int(os.getenv("WALL_CONCURRENCY", "4"))
+ROBLOX_COOKIE = os.getenv("ROBLOX_COOKIE")
+POLL_INTERVAL = float(os.getenv("WALL_POLL_INTERVAL", "30"))
+POLL_MIN = float(os.getenv("WALL_POLL_MIN", "10"))
+POLL_MAX = float(os.getenv("WALL_POLL_MAX", "300"))
+STALE_AFTER = float(os.getenv("WALL_STALE_AFTER", "60"))
+BREAKER_THRESHOLD = int(os.getenv("WALL_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("WALL_BREAKER_COOLDOWN", "60"))
+# unset: one file per link mode (wall_state_strict.json, ...), so STRICT and
+# LOOSE bots sharing a directory keep separate watermarks and links
+WALL_STATE_FILE = os.getenv("WALL_STATE_FILE")
+
+# override to point at benchmarks/wall_standin.py
+GROUPS_API = os.getenv("ROBLOX_GROUPS_API", "https://groups.roblox.com").rstrip("/")
+WALL_URL = GROUPS_API + "/v2/groups/{group_id}/wall/posts"
+WARM_PAGE_LIMIT = 10    # newest few posts when we already have a watermark
+FULL_PAGE_LIMIT = 100   # cold start, or when the first warm page was all new
+MAX_PAGES = 5
+SNAPSHOT_CAP = 200
+POST_MEMO_CAP = 2048
+
+
+class WallSnapshot:
+    """Links extracted from the last successful wall fetch (newest first)."""
+    __slots__ = ("version", "links", "fetched_at")
+
+    def __init__(self, version=0, links=(), fetched_at=0.0):
+        self.version = version
+        self.links = tuple(links)
+        self.fetched_at = fetched_at
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at if self.fetched_at else None
+
+
+_snapshot = WallSnapshot()
+_poller_task = None
+_wake = None
+_listeners = []
+
+
+def get_snapshot():
+    return _snapshot
+
+
+def add_new_links_listener(callback):
+    """
+    callback(links) runs after each ingest that finds links not already in the
+    snapshot (newest first). It runs on the poller task, so it should only
+    queue work. Not called for the first ingest into an empty snapshot.
+    """
+    _listeners.append(callback)
+
+
+def freshness_text(snapshot=None):
+    """Footer suffix: "updated 42s ago", plus a warning while Roblox is unreachable."""
+    snapshot = snapshot or _snapshot
+    age = snapshot.age
+    if age is None:
+        text = "not updated yet"
+    elif age < 5:
+        text = "updated just now"
+    elif age < 60:
+        text = f"updated {age:.0f}s ago"
+    elif age < 3600:
+        text = f"updated {age // 60:.0f}m ago"
+    else:
+        text = f"updated {age // 3600:.0f}h ago"
+    if breaker.state == OPEN:
+        text += " (Roblox unreachable)"
+    return text
+
+
+# ---- Persisted ingest state ----
+# {"mode": link mode, "watermarks": {group_id: <highest post id processed>}, "links": [newest first]}
+def wall_state_file(mode):
+    return WALL_STATE_FILE or f"wall_state_{mode}.json"
+
+
+def load_wall_state(mode):
+    path = wall_state_file(mode)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception:
+        return {}
+    if state.get("mode", mode) != mode:
+        # links extracted under another mode; starting cold is cheaper than serving them
+        print(f"[WARN] {path} was written for {state['mode']} links, not {mode}; ignoring it")
+        return {}
+    if "watermark" in state:
+        # single-group state from before GROUP_IDS
+        state.setdefault("watermarks", {})[GROUP_ID or ""] = state.pop("watermark")
+    return state
+
+
+def save_wall_state(state):
+    path = wall_state_file(state.get("mode"))
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[ERROR] saving {path}: {e}")
+
+
+_state = {}
+_state_mode = None
+
+
+def use_wall_state(mode):
+    """Load the persisted state for this link mode, once; restores the snapshot."""
+    global _state, _state_mode, _snapshot
+    if _state_mode == mode:
+        return
+    _state = load_wall_state(mode)
+    _state["mode"] = _state_mode = mode
+    if _state.get("links"):
+        _snapshot = WallSnapshot(1, _state["links"], 0.0)
+
+
+# ---- Fetch group posts ----
+class WallRateLimited(RuntimeError):
+    """Roblox answered 429; retry_after is in seconds."""
+    def __init__(self, retry_after):
+        super().__init__(f"RATE_LIMITED:{retry_after}")
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value, default=60.0):
+    """Retry-After is either delta-seconds or an HTTP date."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+# (group_id, limit) -> (etag, last_modified, digest, data), first pages only:
+# that's the page re-polled every cycle, and cursors are one-off tokens, so
+# caching deeper pages would only grow the dict
+_page_cache = {}
+# (group_id, post id) -> (body, links)
+_post_links = {}
+_stats = {
+    "pages": 0,
+    "not_modified": 0,
+    "digest_hits": 0,
+    "posts_scanned": 0,
+    "posts_memo_hits": 0,
+    "bytes": 0,
+}
+
+
+def wall_stats():
+    return dict(_stats)
+
+
+async def fetch_wall_page(group_id, limit, cursor=None):
+    """
+    Fetch one page of the wall (newest first). Returns (data, changed), or
+    None on failure. changed is False when the server answered 304 or the body
+    hashes to the same digest as last time; data is then the cached parse.
+    """
+    url = WALL_URL.format(group_id=group_id)
+    params = {"sortOrder": "Desc", "limit": str(limit)}
+    if cursor:
+        params["cursor"] = cursor
+    headers = {"Cookie": f".ROBLOSECURITY={ROBLOX_COOKIE}"} if ROBLOX_COOKIE else {}
+    key = (group_id, limit) if cursor is None else None
+    cached = _page_cache.get(key)
+    if cached:
+        etag, last_modified, _, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    try:
+        async with get_http_session().get(url, params=params, headers=headers) as resp:
+            _stats["pages"] += 1
+            if resp.status == 304 and cached:
+                _stats["not_modified"] += 1
+                return cached[3], False
+            if resp.status == 429:
+                raise WallRateLimited(parse_retry_after(resp.headers.get("Retry-After")))
+            if resp.status != 200:
+                print(f"[WARN] fetch_wall_page HTTP {resp.status}")
+                return None
+            raw = await resp.read()
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+    except WallRateLimited:
+        raise
+    except Exception as e:
+        print(f"[ERROR] fetch_wall_page: {e}")
+        return None
+
+    _stats["bytes"] += len(raw)
+    digest = hashlib.blake2b(raw, digest_size=16).digest()
+    if cached and cached[2] == digest:
+        _stats["digest_hits"] += 1
+        _page_cache[key] = (etag, last_modified, digest, cached[3])
+        return cached[3], False
+    data = json.loads(raw)
+    if key is not None:
+        _page_cache[key] = (etag, last_modified, digest, data)
+    return data, True
+
+
+async def fetch_new_posts(group_id, watermark):
+    """
+    Return posts newer than the watermark (newest first), or None on failure.
+    Without a watermark this is a single full page, same as the old fetch.
+    """
+    limit = WARM_PAGE_LIMIT if watermark else FULL_PAGE_LIMIT
+    cursor = None
+    posts = []
+    for _ in range(MAX_PAGES):
+        result = await fetch_wall_page(group_id, limit, cursor)
+        if result is None:
+            return None
+        page, changed = result
+        if watermark and not changed and cursor is None:
+            # same newest page as last poll: nothing new past the watermark
+            return posts
+        for post in page.get("data") or []:
+            if watermark and (post.get("id") or 0) <= watermark:
+                return posts
+            post["_group"] = group_id
+            posts.append(post)
+        cursor = page.get("nextPageCursor")
+        if not watermark or not cursor:
+            break
+        if limit != FULL_PAGE_LIMIT:
+            # the small page was all new: restart at full size rather than
+            # reuse a cursor minted for a different page size
+            limit = FULL_PAGE_LIMIT
+            cursor = None
+            posts = []
+    return posts
+
+
+def post_time(post):
+    try:
+        return datetime.fromisoformat(post["created"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+_fetch_sem = asyncio.Semaphore(WALL_CONCURRENCY)
+# group_id -> time before which that group is still under a Retry-After
+_retry_at = {}
+
+
+async def _fetch_group(group_id, watermark):
+    async with _fetch_sem:
+        return await fetch_new_posts(group_id, watermark)
+
+
+async def fetch_all_new_posts(group_ids, watermarks):
+    """
+    Fetch every group concurrently (at most WALL_CONCURRENCY at once) and
+    merge their new posts into one newest-first list. Returns
+    (posts, {group_id: posts}) for the groups that succeeded. Groups still
+    inside a Retry-After window are skipped; if every group is rate-limited
+    this raises WallRateLimited.
+    """
+    now = time.time()
+    waiting = [g for g in group_ids if _retry_at.get(g, 0) > now]
+    group_ids = [g for g in group_ids if g not in waiting]
+    results = await asyncio.gather(
+        *(_fetch_group(g, watermarks.get(g)) for g in group_ids),
+        return_exceptions=True,
+    )
+    per_group = {}
+    limited = [WallRateLimited(_retry_at[g] - now) for g in waiting]
+    for group_id, result in zip(group_ids, results):
+        if isinstance(result, WallRateLimited):
+            _retry_at[group_id] = now + result.retry_after
+            limited.append(result)
+        elif isinstance(result, BaseException):
+            print(f"[ERROR] fetch group {group_id}: {result}")
+        elif result is not None:
+            per_group[group_id] = result
+    if limited and not per_group:
+        raise WallRateLimited(max(e.retry_after for e in limited))
+    if not per_group:
+        return None, per_group
+    # each group's list is already newest first; merge on post timestamp
+    merged = list(heapq.merge(*per_group.values(), key=post_time, reverse=True))
+    return merged, per_group
+
+
+def post_links(post, mode):
+    """Links in one post body, memoized by post id so re-seen posts cost a dict hit."""
+    body = post.get("body") or ""
+    pid = (post.get("_group"), post["id"]) if post.get("id") is not None else None
+    memo = _post_links.get(pid)
+    if memo is not None and memo[0] == body:
+        _stats["posts_memo_hits"] += 1
+        return memo[1]
+    _stats["posts_scanned"] += 1
+    links = tuple(find_links(body, mode))
+    if pid is not None:
+        if len(_post_links) >= POST_MEMO_CAP:
+            del _post_links[next(iter(_post_links))]
+        _post_links[pid] = (body, links)
+    return links
+
+
+def extract_links(posts, mode):
+    """Links across posts, one per canonical key, first occurrence wins."""
+    seen = set()
+    unique = []
+    for post in posts:
+        for link in post_links(post, mode):
+            key = canonical_link(link)
+            if key not in seen:
+                seen.add(key)
+                unique.append(link)
+    return unique
+
+
+async def refresh_snapshot(mode=STRICT):
+    """
+    Ingest posts newer than each group's watermark and publish a new snapshot.
+    Returns the number of new links, or None if every fetch failed. Raises
+    WallRateLimited when every group is rate-limited. With no groups
+    configured there is nothing to fetch, which counts as a quiet poll (0).
+    """
+    global _snapshot
+    use_wall_state(mode)
+    if not GROUP_IDS:
+        return 0
+    watermarks = _state.setdefault("watermarks", {})
+    posts, per_group = await fetch_all_new_posts(GROUP_IDS, watermarks)
+    if posts is None:
+        return None
+
+    if not posts:
+        _snapshot = WallSnapshot(_snapshot.version, _snapshot.links, time.time())
+        return 0
+
+    new_links = extract_links(posts, mode)
+    known = {canonical_link(l) for l in _snapshot.links}
+    added = [l for l in new_links if canonical_link(l) not in known]
+    fresh = {canonical_link(l) for l in new_links}
+    links = tuple((new_links + [l for l in _snapshot.links if canonical_link(l) not in fresh])[:SNAPSHOT_CAP])
+    version = _snapshot.version + 1 if links != _snapshot.links else _snapshot.version
+    cold = not _snapshot.links
+    _snapshot = WallSnapshot(version, links, time.time())
+
+    for group_id, group_posts in per_group.items():
+        if group_posts:
+            newest = max(post.get("id") or 0 for post in group_posts)
+            watermarks[group_id] = max(watermarks.get(group_id) or 0, newest)
+    _state["links"] = list(links)
+    save_wall_state(_state)
+
+    if added and not cold:
+        for callback in _listeners:
+            try:
+                callback(added)
+            except Exception as e:
+                print(f"[ERROR] new-links listener: {e}")
+    return len(added)
+
+
+# ---- Adaptive scheduler ----
+class PollScheduler:
+    """
+    Picks the delay before the next wall poll. Quiet polls and failures back
+    off exponentially (with jitter) up to max_interval; a poll that finds new
+    links snaps back to min_interval. A 429 waits at least Retry-After.
+    """
+    def __init__(self, interval=POLL_INTERVAL, min_interval=POLL_MIN, max_interval=POLL_MAX,
+                 backoff=1.5, jitter=0.2):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max(interval, min_interval), max_interval)
+        self.backoff = backoff
+        self.jitter = jitter
+        self.polls = 0
+        self.hits = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.retry_after = 0.0
+
+    def _jittered(self, delay):
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def on_result(self, new_links):
+        """Record a poll outcome (new link count, or None on failure); return the next delay."""
+        self.polls += 1
+        self.retry_after = 0.0
+        if new_links:
+            self.hits += 1
+            self.interval = self.min_interval
+        else:
+            if new_links is None:
+                self.failures += 1
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return self._jittered(self.interval)
+
+    def on_rate_limited(self, retry_after):
+        self.polls += 1
+        self.rate_limited += 1
+        self.retry_after = retry_after
+        self.interval = min(self.interval * self.backoff, self.max_interval)
+        return max(retry_after, self._jittered(self.interval))
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.polls if self.polls else 0.0
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "polls": self.polls,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate,
+            "failures": self.failures,
+            "rate_limited": self.rate_limited,
+            "retry_after": self.retry_after,
+        }
+
+
+scheduler = PollScheduler()
+
+
+# ---- Circuit breaker ----
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """
+    closed: fetch normally. After `threshold` consecutive failures it opens
+    and no fetches are made for `cooldown` seconds. Then it goes half-open
+    and lets one trial fetch through; success closes it, failure reopens.
+    """
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.trips = 0
+        self.opened_at = 0.0
+
+    def allow(self):
+        if self.state == OPEN and time.time() - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+        return self.state != OPEN
+
+    def retry_in(self):
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown - time.time())
+
+    def record_success(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.threshold:
+            if self.state != OPEN:
+                self.trips += 1
+                print(f"[WARN] wall circuit breaker open after {self.consecutive_failures} failures")
+            self.state = OPEN
+            self.opened_at = time.time()
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "trips": self.trips,
+            "retry_in": self.retry_in(),
+        }
+
+
+breaker = CircuitBreaker()
+
+
+# ---- Background poller ----
+async def _poll_loop(mode):
+    global _wake
+    _wake = asyncio.Event()
+    while True:
+        if not breaker.allow():
+            delay = breaker.retry_in()
+        else:
+            try:
+                added = await refresh_snapshot(mode)
+                if added is None:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                delay = scheduler.on_result(added)
+            except WallRateLimited as e:
+                print(f"[WARN] wall poller rate-limited, retry after {e.retry_after:.0f}s")
+                delay = scheduler.on_rate_limited(e.retry_after)
+            except Exception as e:
+                print(f"[ERROR] wall poller: {e}")
+                breaker.record_failure()
+                delay = scheduler.on_result(None)
+        # requests that arrived while we were fetching are already satisfied
+        _wake.clear()
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+def revalidate_if_stale():
+    """
+    Called by commands after reading the snapshot: if it's older than
+    STALE_AFTER and than the poller's current interval, wake the poller for
+    one early refresh. Never blocks, and does nothing while the breaker is
+    open or a scheduled 429 wait is pending.
+    """
+    snap = _snapshot
+    if _wake is None or _wake.is_set() or not GROUP_IDS:
+        return
+    # while the poller is backed off on a quiet wall, a snapshot one interval
+    # old is as fresh as the schedule intends; waking it early would spend the
+    # requests the backoff is saving
+    if snap.age is not None and snap.age < max(STALE_AFTER, scheduler.interval):
+        return
+    if breaker.state == OPEN or scheduler.retry_after:
+        return
+    _wake.set()
+
+
+def start_wall_poller(mode=STRICT):
+    """Start the poller once per process; later calls (e.g. on reconnect) are no-ops."""
+    global _poller_task
+    use_wall_state(mode)
+    if _poller_task is None or _poller_task.done():
+        if not GROUP_IDS:
+            print("[WARN] no GROUP_IDS/GROUP_ID set; the wall poller will stay idle")
+        _poller_task = asyncio.get_running_loop().create_task(_poll_loop(mode))
+    return _poller_task
+
+
+def stop_wall_poller():
+    global _poller_task
+    if _poller_task is not None:
+        _poller_task.cancel()
+        _poller_task = None
@@ -0,0 +1,156 @@
+# seen_filter.py - per-guild Bloom filters in front of the seen_links table
+#
+# A Bloom filter never says "not seen" for a key that was added, so a negative
+# answer lets the caller skip the database entirely. A positive answer may be
+# a false positive (at roughly SEEN_FILTER_FP) and has to be confirmed.
+#
+# Filters are rebuilt from the table (through the loader callback) the first
+# time a guild is looked up, and again once a guild has had more keys added
+# than the filter was sized for. Guilds are evicted least-recently-used when
+# the total size would go over SEEN_FILTER_MEMORY; an evicted guild simply
+# gets reloaded on its next lookup.
+import os
+import math
+import threading
+from collections import OrderedDict
+
+SEEN_FILTER_FP = float(os.getenv("SEEN_FILTER_FP", "0.01"))
+SEEN_FILTER_CAPACITY = int(os.getenv("SEEN_FILTER_CAPACITY", "1000"))  # keys per guild before a rebuild
+SEEN_FILTER_MEMORY = int(os.getenv("SEEN_FILTER_MEMORY", str(8 << 20)))  # bytes across all guilds
+
+
+class BloomFilter:
+    __slots__ = ("bits", "size", "hashes", "count")
+
+    def __init__(self, capacity, fp_rate):
+        size = max(64, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.size = size
+        self.hashes = max(1, round(size / capacity * math.log(2)))
+        self.bits = bytearray((size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # double hashing on the two halves of str's (cached) hash: filters are
+        # rebuilt every process, so per-process hash seeds don't matter
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, key):
+        bits = self.bits
+        for pos in self._positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        size = self.size
+        for i in range(self.hashes):
+            pos = (h1 + i * h2) % size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+
+class SeenLinkFilter:
+    """
+    loader(gid) returns the guild's stored keys. Lookups are lock-free; only
+    building, adding and evicting take the (in-process) lock, never the DB's.
+    """
+
+    def __init__(self, loader, capacity=SEEN_FILTER_CAPACITY, fp_rate=SEEN_FILTER_FP,
+                 memory_budget=SEEN_FILTER_MEMORY):
+        self.loader = loader
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.memory_budget = memory_budget
+        self._filters = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.lookups = 0
+        self.definite_misses = 0
+        self.maybe_seen = 0
+        self.false_positives = 0
+        self.rebuilds = 0
+        self.evictions = 0
+
+    def _install(self, gid, keys):
+        bloom = BloomFilter(self.capacity, self.fp_rate)
+        for key in keys:
+            bloom.add(key)
+        with self._lock:
+            old = self._filters.pop(gid, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            while self._filters and self.nbytes + bloom.nbytes > self.memory_budget:
+                _, evicted = self._filters.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+                self.evictions += 1
+            if bloom.nbytes > self.memory_budget:
+                return None
+            self._filters[gid] = bloom
+            self.nbytes += bloom.nbytes
+            self.rebuilds += 1
+        return bloom
+
+    def _get(self, gid):
+        bloom = self._filters.get(gid)
+        if bloom is None:
+            return self._install(gid, self.loader(gid))
+        try:
+            self._filters.move_to_end(gid)
+        except KeyError:
+            pass  # evicted by another thread in between; still fine to use
+        return bloom
+
+    def warm(self, gid, keys):
+        """Build a guild's filter from keys already in hand (startup)."""
+        self._install(gid, keys)
+
+    def definitely_new(self, gid, key):
+        """True only when key was certainly never added for this guild."""
+        self.lookups += 1
+        bloom = self._get(gid)
+        if bloom is not None and key not in bloom:
+            self.definite_misses += 1
+            return True
+        self.maybe_seen += 1
+        return False
+
+    def add(self, gid, keys):
+        bloom = self._filters.get(gid)
+        if bloom is None:
+            return  # built from the table on next lookup, which will include keys
+        with self._lock:
+            for key in keys:
+                bloom.add(key)
+        if bloom.count > self.capacity:
+            # past its sizing the FP rate climbs; reload from the (trimmed) table
+            self.forget(gid)
+
+    def forget(self, gid):
+        with self._lock:
+            bloom = self._filters.pop(gid, None)
+            if bloom is not None:
+                self.nbytes -= bloom.nbytes
+
+    def stats(self):
+        return {
+            "guilds": len(self._filters),
+            "bytes": self.nbytes,
+            "lookups": self.lookups,
+            "definite_misses": self.definite_misses,
+            "maybe_seen": self.maybe_seen,
+            "false_positives": self.false_positives,
+            "rebuilds": self.rebuilds,
+            "evictions": self.evictions,
+        }
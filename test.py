@@ -7,7 +7,8 @@ import time
 import discord
 from discord import app_commands
 from flask import Flask
-import aiohttp
+from http_client import open_http_session, get_http_session, run_client
+from link_extract import unique_links, LOOSE
 
 # ---- Secrets ----
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -107,25 +108,12 @@ async def check_user_ban(interaction: discord.Interaction):
 async def fetch_group_posts():
     url = f"https://groups.roblox.com/v2/groups/{GROUP_ID}/wall/posts?sortOrder=Desc&limit=100"
     headers = {"Cookie": f".ROBLOSECURITY={ROBLOX_COOKIE}"} if ROBLOX_COOKIE else {}
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as resp:
-            if resp.status != 200:
-                print(f"⚠️ Failed to fetch posts: {resp.status}")
-                return []
-            data = await resp.json()
-    links = []
-    for post in data.get("data", []):
-        content = post.get("body", "")
-        found = re.findall(r"(https?://[^\s]+roblox\.com/[^\s]*)", content)
-        links.extend(found)
-    # dedupe
-    seen = set()
-    unique_links = []
-    for l in links:
-        if l not in seen:
-            seen.add(l)
-            unique_links.append(l)
-    return unique_links
+    async with get_http_session().get(url, headers=headers) as resp:
+        if resp.status != 200:
+            print(f"⚠️ Failed to fetch posts: {resp.status}")
+            return []
+        data = await resp.json()
+    return unique_links((post.get("body", "") for post in data.get("data", [])), LOOSE)
 
 # ---- Maintenance flag ----
 MAINTENANCE = False
@@ -298,12 +286,11 @@ async def ban_invite(interaction: discord.Interaction, invite: str, reason: str
         return
     code = m.group(1)
     url = f"https://discord.com/api/v10/invites/{code}?with_counts=false"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
-            if resp.status != 200:
-                await interaction.response.send_message(f"❌ Failed to resolve invite (HTTP {resp.status}).", ephemeral=True)
-                return
-            data = await resp.json()
+    async with get_http_session().get(url) as resp:
+        if resp.status != 200:
+            await interaction.response.send_message(f"❌ Failed to resolve invite (HTTP {resp.status}).", ephemeral=True)
+            return
+        data = await resp.json()
     guild = data.get("guild")
     if not guild:
         await interaction.response.send_message("❌ Invite has no guild info.", ephemeral=True)
@@ -387,6 +374,7 @@ async def remove_owner(interaction: discord.Interaction, user_id: str):
 # ---- Events ----
 @client.event
 async def on_ready():
+    await open_http_session()
     await tree.sync()
     print(f"✅ Logged in as {client.user}")
     print("Slash commands synced and ready!")
@@ -410,4 +398,4 @@ flask_thread = threading.Thread(target=run_flask)
 flask_thread.start()
 
 # ---- Run Discord ----
-client.run(TOKEN)
+run_client(client, TOKEN)